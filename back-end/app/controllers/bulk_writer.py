@@ -0,0 +1,284 @@
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Type
+from bson import ObjectId
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.schemas.bulk import (
+    BulkItemResult, BulkItemStatus, BulkOperation, BulkOperationType, BulkWriteResponse
+)
+
+# Number of operations sent to MongoDB per bulk_write call
+BULK_BATCH_SIZE = 1000
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonlines")
+
+async def read_bulk_items(request: Request) -> AsyncIterator[Any]:
+    """Yield bulk items from a JSON array body or, line by line, from an NDJSON stream"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_MEDIA_TYPES:
+        pending = b""
+        async for chunk in request.stream():
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if pending.strip():
+            yield pending
+        return
+
+    try:
+        items = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a JSON array of operations"
+        )
+    for item in items:
+        yield item
+
+class _PendingWrite:
+    __slots__ = ("index", "op", "request", "object_id")
+
+    def __init__(self, index: int, op: BulkOperationType, request, object_id: ObjectId):
+        self.index = index
+        self.op = op
+        self.request = request
+        self.object_id = object_id
+
+class BulkWriter:
+    """Validates bulk items and sends them to a collection in bulk_write batches.
+
+    Every update and delete filter carries the caller's ``user_id`` so documents
+    owned by someone else can never be touched, whatever the batch contains.
+    """
+
+    def __init__(
+        self,
+        collection,
+        user_id: str,
+        create_model: Type[BaseModel],
+        update_model: Type[BaseModel],
+        resource: str,
+        ordered: bool = True,
+        batch_size: int = BULK_BATCH_SIZE,
+    ):
+        self.collection = collection
+        self.user_id = user_id
+        self.create_model = create_model
+        self.update_model = update_model
+        self.resource = resource
+        self.ordered = ordered
+        self.batch_size = batch_size
+        self.response = BulkWriteResponse(ordered=ordered)
+        self.stopped = False
+        self._pending: List[_PendingWrite] = []
+        self._next_index = 0
+
+    async def write_all(self, items: AsyncIterator[Any]) -> BulkWriteResponse:
+        async for item in items:
+            await self.add(item)
+        await self.flush()
+        self.response.results.sort(key=lambda result: result.index)
+        return self.response
+
+    async def add(self, item: Any) -> None:
+        index = self._next_index
+        self._next_index += 1
+        if self.stopped:
+            self._record(index, None, BulkItemStatus.skipped)
+            return
+
+        try:
+            pending = self._prepare(index, item)
+        except ValueError as e:
+            self._record(index, getattr(e, "op", None), BulkItemStatus.error, error=str(e))
+            if self.ordered:
+                await self.flush()
+                self.stopped = True
+            return
+
+        self._pending.append(pending)
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        batch = await self._drop_unowned(batch)
+        if not batch:
+            return
+
+        failed: Dict[int, str] = {}
+        try:
+            result = await self.collection.bulk_write([p.request for p in batch], ordered=self.ordered)
+            matched, deleted = result.matched_count, result.deleted_count
+            self.response.inserted_count += result.inserted_count
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed[write_error["index"]] = write_error.get("errmsg", "Write failed")
+            matched, deleted = e.details.get("nMatched", 0), e.details.get("nRemoved", 0)
+            self.response.inserted_count += e.details.get("nInserted", 0)
+        self.response.updated_count += matched
+        self.response.deleted_count += deleted
+
+        first_failure = min(failed) if failed else None
+        written = []
+        for position, pending in enumerate(batch):
+            if position in failed:
+                self._record(pending.index, pending.op, BulkItemStatus.error,
+                             str(pending.object_id), failed[position])
+            elif self.ordered and first_failure is not None and position > first_failure:
+                self._record(pending.index, pending.op, BulkItemStatus.skipped, str(pending.object_id))
+            else:
+                written.append(pending)
+
+        not_applied = await self._not_applied(written, matched, deleted)
+        for pending in written:
+            if pending.object_id in not_applied:
+                self._record(pending.index, pending.op, BulkItemStatus.error,
+                             str(pending.object_id), f"{self.resource.capitalize()} not found")
+            else:
+                self._record(pending.index, pending.op, BulkItemStatus.ok, str(pending.object_id))
+
+        if self.ordered and failed:
+            self.stopped = True
+
+    async def _not_applied(self, written: List[_PendingWrite], matched: int, deleted: int) -> set:
+        """IDs of updates and deletes that matched nothing, when the result counts fall short.
+
+        Ownership is checked before the write, so a shortfall means a document was
+        deleted or handed over in between. Only then is the collection asked which
+        of the documents are still there.
+        """
+        updates = [p for p in written if p.op == BulkOperationType.update]
+        deletes = [p for p in written if p.op == BulkOperationType.delete]
+        short_updates = len(updates) > matched
+        short_deletes = len(deletes) > deleted
+        if not short_updates and not short_deletes:
+            return set()
+
+        ids = [p.object_id for p in (updates if short_updates else []) + (deletes if short_deletes else [])]
+        present = set()
+        cursor = self.collection.find({"_id": {"$in": ids}, "user_id": self.user_id}, {"_id": 1})
+        async for document in cursor:
+            present.add(document["_id"])
+
+        not_applied = set()
+        if short_updates:
+            not_applied.update(p.object_id for p in updates if p.object_id not in present)
+        if short_deletes:
+            not_applied.update(p.object_id for p in deletes if p.object_id in present)
+        return not_applied
+
+    def _prepare(self, index: int, item: Any) -> _PendingWrite:
+        if isinstance(item, (bytes, str)):
+            try:
+                item = json.loads(item)
+            except ValueError:
+                raise ValueError("Invalid JSON")
+        if not isinstance(item, dict):
+            raise ValueError("Expected a JSON object")
+
+        # A bare create payload is accepted as shorthand for {"op": "create", "data": ...}
+        if "op" not in item and "data" not in item:
+            item = {"op": BulkOperationType.create, "data": item}
+
+        try:
+            operation = BulkOperation(**item)
+        except ValidationError as e:
+            raise ValueError(_validation_message(e))
+
+        try:
+            if operation.op == BulkOperationType.create:
+                return self._prepare_create(index, operation)
+            return self._prepare_change(index, operation)
+        except ValueError as e:
+            e.op = operation.op
+            raise
+
+    def _prepare_create(self, index: int, operation: BulkOperation) -> _PendingWrite:
+        try:
+            document = self.create_model(**(operation.data or {})).model_dump()
+        except ValidationError as e:
+            raise ValueError(_validation_message(e))
+        if document.get("user_id") != self.user_id:
+            raise ValueError(f"Not authorized to create {self.resource} for this user")
+
+        document["_id"] = ObjectId()
+        return _PendingWrite(index, operation.op, InsertOne(document), document["_id"])
+
+    def _prepare_change(self, index: int, operation: BulkOperation) -> _PendingWrite:
+        if not operation.id or not ObjectId.is_valid(operation.id):
+            raise ValueError(f"Invalid {self.resource} ID")
+        object_id = ObjectId(operation.id)
+        owned_filter = {"_id": object_id, "user_id": self.user_id}
+
+        if operation.op == BulkOperationType.delete:
+            return _PendingWrite(index, operation.op, DeleteOne(owned_filter), object_id)
+
+        try:
+            update_data = self.update_model(**(operation.data or {})).model_dump(exclude_unset=True)
+        except ValidationError as e:
+            raise ValueError(_validation_message(e))
+        if not update_data:
+            raise ValueError("No valid update data provided")
+        return _PendingWrite(index, operation.op, UpdateOne(owned_filter, {"$set": update_data}), object_id)
+
+    async def _drop_unowned(self, batch: List[_PendingWrite]) -> List[_PendingWrite]:
+        """Report updates and deletes of documents the user does not own as not found.
+
+        bulk_write only returns aggregate counts, so ownership is resolved with one
+        lookup per batch to attribute a result to every item. Deletes are replayed
+        in batch order, so a second delete of a document, or an update after its
+        delete, is not found either. The owner filter on each write still guards
+        against documents changing hands in between.
+        """
+        ids = [p.object_id for p in batch if p.op != BulkOperationType.create]
+        owned = set()
+        if ids:
+            cursor = self.collection.find({"_id": {"$in": ids}, "user_id": self.user_id}, {"_id": 1})
+            async for document in cursor:
+                owned.add(document["_id"])
+
+        kept = []
+        for position, pending in enumerate(batch):
+            if pending.op == BulkOperationType.create or pending.object_id in owned:
+                if pending.op == BulkOperationType.delete:
+                    owned.discard(pending.object_id)
+                kept.append(pending)
+                continue
+            self._record(pending.index, pending.op, BulkItemStatus.error,
+                         str(pending.object_id), f"{self.resource.capitalize()} not found")
+            if self.ordered:
+                for skipped in batch[position + 1:]:
+                    self._record(skipped.index, skipped.op, BulkItemStatus.skipped, str(skipped.object_id))
+                self.stopped = True
+                break
+        return kept
+
+    def _record(
+        self,
+        index: int,
+        op: Optional[BulkOperationType],
+        item_status: BulkItemStatus,
+        object_id: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        # Inserted, updated and deleted counts come from the bulk_write result
+        if item_status == BulkItemStatus.error:
+            self.response.error_count += 1
+        self.response.results.append(
+            BulkItemResult(index=index, op=op, status=item_status, id=object_id, error=error)
+        )
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'item'}: {e['msg']}" for e in error.errors()
+    )
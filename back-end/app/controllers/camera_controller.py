@@ -1,8 +1,11 @@
-from typing import List, Optional
+from typing import Any, AsyncIterator, List, Optional
 from bson import ObjectId
 from fastapi import HTTPException, status
 from app.database import get_database
-from app.schemas.camera import CameraCreate, CameraInDB, CameraResponse, CameraUpdate
+from app.controllers.bulk_writer import BulkWriter
+from app.core.alert_broker import get_alert_broker
+from app.schemas.bulk import BulkItemStatus, BulkOperationType, BulkWriteResponse
+from app.schemas.camera import AlertClass, CameraCreate, CameraInDB, CameraResponse, CameraUpdate
 from app.core.security import get_current_user
 
 class CameraController:
@@ -13,9 +16,7 @@ class CameraController:
     def db(self):
         if self._db is None:
             self._db = get_database()
-            if self._db.client is None:
-                self._db.connect_to_database()
-        return self._db.client.fastapi_db.cameras
+        return self._db.get_collection("cameras")
 
     async def create_camera(self, camera: CameraCreate, user_id: str) -> CameraResponse:
         # Verify user exists and owns the camera
@@ -28,16 +29,19 @@ class CameraController:
         camera_dict = camera.model_dump()
         result = await self.db.insert_one(camera_dict)
         created_camera = await self.db.find_one({"_id": result.inserted_id})
+        get_alert_broker().camera_added(str(result.inserted_id), user_id)
         return CameraResponse(**created_camera)
 
     async def get_user_cameras(self, user_id: str) -> List[CameraResponse]:
-        cameras = []
-        cursor = self.db.find({"user_id": user_id})
-        async for document in cursor:
-            cameras.append(CameraResponse(**document))
-        return cameras
+        return [CameraResponse(**document) for document in await self.get_user_camera_documents(user_id)]
+
+    async def get_user_camera_documents(self, user_id: str) -> List[dict]:
+        return await self.db.find({"user_id": user_id}).to_list(length=None)
 
     async def get_camera(self, camera_id: str, user_id: str) -> CameraResponse:
+        return CameraResponse(**await self.get_camera_document(camera_id, user_id))
+
+    async def get_camera_document(self, camera_id: str, user_id: str) -> dict:
         if not ObjectId.is_valid(camera_id):
             raise HTTPException(status_code=400, detail="Invalid camera ID")
 
@@ -51,7 +55,18 @@ class CameraController:
                 detail="Not authorized to access this camera"
             )
 
-        return CameraResponse(**camera)
+        return camera
+
+    async def get_camera_alert_classes(self, camera_id: str) -> List[AlertClass]:
+        """Alert rules of a camera for its detection worker, which has no user session"""
+        if not ObjectId.is_valid(camera_id):
+            raise HTTPException(status_code=400, detail="Invalid camera ID")
+
+        camera = await self.db.find_one({"_id": ObjectId(camera_id)}, {"alert_classes": 1})
+        if not camera:
+            raise HTTPException(status_code=404, detail="Camera not found")
+
+        return [AlertClass(**alert_class) for alert_class in camera.get("alert_classes", [])]
 
     async def update_camera(self, camera_id: str, camera: CameraUpdate, user_id: str) -> CameraResponse:
         if not ObjectId.is_valid(camera_id):
@@ -100,4 +115,20 @@ class CameraController:
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Camera not found")
 
-        return True 
\ No newline at end of file
+        # Connected dashboards stop receiving this camera's alerts right away
+        get_alert_broker().camera_removed(camera_id)
+        return True
+
+    async def bulk_write(self, items: AsyncIterator[Any], user_id: str, ordered: bool = True) -> BulkWriteResponse:
+        writer = BulkWriter(self.db, user_id, CameraCreate, CameraUpdate, "camera", ordered=ordered)
+        response = await writer.write_all(items)
+
+        broker = get_alert_broker()
+        for result in response.results:
+            if result.status != BulkItemStatus.ok:
+                continue
+            if result.op == BulkOperationType.create:
+                broker.camera_added(result.id, user_id)
+            elif result.op == BulkOperationType.delete:
+                broker.camera_removed(result.id)
+        return response
@@ -14,9 +14,7 @@ class UserController:
     def db(self):
         if self._db is None:
             self._db = get_database()
-            if self._db.client is None:
-                self._db.connect_to_database()
-        return self._db.client.fastapi_db.users
+        return self._db.get_collection("users")
 
     async def create_user(self, user: UserCreate) -> UserResponse:
         # Check if user already exists
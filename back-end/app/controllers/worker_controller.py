@@ -1,7 +1,9 @@
-from typing import List, Optional
+from typing import Any, AsyncIterator, List, Optional
 from bson import ObjectId
 from fastapi import HTTPException, status
 from app.database import get_database
+from app.controllers.bulk_writer import BulkWriter
+from app.schemas.bulk import BulkWriteResponse
 from app.schemas.worker import WorkerCreate, WorkerInDB, WorkerResponse, WorkerUpdate
 from app.core.security import get_current_user
 
@@ -13,9 +15,7 @@ class WorkerController:
     def db(self):
         if self._db is None:
             self._db = get_database()
-            if self._db.client is None:
-                self._db.connect_to_database()
-        return self._db.client.fastapi_db.workers
+        return self._db.get_collection("workers")
 
     async def create_worker(self, worker: WorkerCreate, user_id: str) -> WorkerResponse:
         # Verify user exists and owns the worker
@@ -31,13 +31,15 @@ class WorkerController:
         return WorkerResponse(**created_worker)
 
     async def get_user_workers(self, user_id: str) -> List[WorkerResponse]:
-        workers = []
-        cursor = self.db.find({"user_id": user_id})
-        async for document in cursor:
-            workers.append(WorkerResponse(**document))
-        return workers
+        return [WorkerResponse(**document) for document in await self.get_user_worker_documents(user_id)]
+
+    async def get_user_worker_documents(self, user_id: str) -> List[dict]:
+        return await self.db.find({"user_id": user_id}).to_list(length=None)
 
     async def get_worker(self, worker_id: str, user_id: str) -> WorkerResponse:
+        return WorkerResponse(**await self.get_worker_document(worker_id, user_id))
+
+    async def get_worker_document(self, worker_id: str, user_id: str) -> dict:
         if not ObjectId.is_valid(worker_id):
             raise HTTPException(status_code=400, detail="Invalid worker ID")
 
@@ -51,7 +53,7 @@ class WorkerController:
                 detail="Not authorized to access this worker"
             )
 
-        return WorkerResponse(**worker)
+        return worker
 
     async def update_worker(self, worker_id: str, worker: WorkerUpdate, user_id: str) -> WorkerResponse:
         if not ObjectId.is_valid(worker_id):
@@ -100,4 +102,8 @@ class WorkerController:
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Worker not found")
 
-        return True 
\ No newline at end of file
+        return True 
+
+    async def bulk_write(self, items: AsyncIterator[Any], user_id: str, ordered: bool = True) -> BulkWriteResponse:
+        writer = BulkWriter(self.db, user_id, WorkerCreate, WorkerUpdate, "worker", ordered=ordered)
+        return await writer.write_all(items)
@@ -0,0 +1,97 @@
+import asyncio
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set
+from dotenv import load_dotenv
+from app.schemas.alert import AlertEvent
+
+load_dotenv()
+
+# Events buffered per connection before the oldest ones are dropped
+ALERT_BUFFER_SIZE = int(os.getenv("ALERT_BUFFER_SIZE", "100"))
+
+class Subscription:
+    """A dashboard connection's bounded view of the alert stream of one user's cameras"""
+
+    def __init__(self, broker: "AlertBroker", user_id: str, camera_id: Optional[str], buffer_size: int):
+        self.broker = broker
+        self.user_id = user_id
+        self.camera_id = camera_id  # None follows every camera the user owns
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+
+    def wants(self, camera_id: str) -> bool:
+        return self.camera_id is None or self.camera_id == camera_id
+
+    def offer(self, event: AlertEvent) -> None:
+        # Never wait on a slow client: make room by discarding its oldest event
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(event)
+
+    async def get(self) -> AlertEvent:
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+class AlertBroker:
+    """In-process pub/sub fanning alert events out to the subscriptions of each camera's owner.
+
+    Subscriptions belong to a user, not to the cameras they owned at connect
+    time. The owner of an event's camera is looked up when it is published,
+    from a map the camera controller updates on every create and delete, so
+    cameras added or removed while a dashboard is connected apply right away.
+    """
+
+    def __init__(self, buffer_size: int = ALERT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._subscriptions: Dict[str, Set[Subscription]] = defaultdict(set)  # by user id
+        self._owners: Dict[str, str] = {}  # camera id -> user id
+        self.published = 0
+
+    def subscribe(self, user_id: str, camera_ids: Iterable[str], camera_id: Optional[str] = None) -> Subscription:
+        """Follow ``user_id``'s cameras, or only ``camera_id``; ``camera_ids`` are the ones they own now"""
+        for owned in camera_ids:
+            self._owners[owned] = user_id
+        subscription = Subscription(self, user_id, camera_id, self.buffer_size)
+        self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscriptions.get(subscription.user_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscriptions[subscription.user_id]
+
+    def camera_added(self, camera_id: str, user_id: str) -> None:
+        self._owners[camera_id] = user_id
+
+    def camera_removed(self, camera_id: str) -> None:
+        self._owners.pop(camera_id, None)
+
+    def publish(self, event: AlertEvent) -> int:
+        """Deliver ``event`` to every subscriber of its camera's owner without blocking, returns the fan-out"""
+        self.published += 1
+        owner = self._owners.get(event.camera_id)
+        if owner is None:
+            return 0
+        subscribers = [s for s in self._subscriptions.get(owner, ()) if s.wants(event.camera_id)]
+        for subscription in subscribers:
+            subscription.offer(event)
+        return len(subscribers)
+
+    @property
+    def connection_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscriptions.values())
+
+broker = AlertBroker()
+
+def get_alert_broker() -> AlertBroker:
+    return broker
@@ -2,7 +2,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import os
 from dotenv import load_dotenv
@@ -13,6 +13,8 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Shared secret detection workers send in the X-Alert-Key header
+ALERT_INGEST_KEY = os.getenv("ALERT_INGEST_KEY")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
@@ -46,7 +48,17 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
-    # Here you would typically fetch the user from the database
-    # For now, we'll just return the email
-    return email 
\ No newline at end of file
+
+    # Imported here because the user controller depends on this module
+    from app.controllers.user_controller import UserController
+    user = await UserController().get_user_by_email(email)
+    if user is None:
+        raise credentials_exception
+    return user
+
+async def verify_alert_key(x_alert_key: Optional[str] = Header(None)):
+    if not ALERT_INGEST_KEY or x_alert_key != ALERT_INGEST_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid alert ingest key"
+        )
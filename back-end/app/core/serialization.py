@@ -0,0 +1,116 @@
+import json
+import os
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, Union, get_args, get_origin
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+from dotenv import load_dotenv
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the standard library encoder
+    orjson = None
+
+load_dotenv()
+
+# Opt-in: serve trusted DB documents without re-validating them through the response models
+FAST_RESPONSES = os.getenv("FAST_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+def _convert(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _convert(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_convert(v) for v in value]
+    return value
+
+def _nested_model(annotation: Any) -> Tuple[Optional[Type[BaseModel]], bool]:
+    """The model inside a field annotation (through Optional and List) and whether it is a list of them"""
+    is_list = False
+    while True:
+        origin = get_origin(annotation)
+        if origin is Union:
+            args = [arg for arg in get_args(annotation) if arg is not type(None)]
+            if len(args) != 1:
+                return None, False
+            annotation = args[0]
+        elif origin is list:
+            if is_list:
+                return None, False
+            is_list = True
+            annotation = get_args(annotation)[0]
+        else:
+            break
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, is_list
+    return None, False
+
+@lru_cache(maxsize=None)
+def _response_fields(model: Type[BaseModel]) -> Tuple[Tuple[str, Callable[[], Any], Optional[Type[BaseModel]], bool], ...]:
+    """(output key, default factory, nested model, is list) for every field the response model would emit"""
+    fields = []
+    for name, field in model.model_fields.items():
+        key = field.alias or name
+        if field.default_factory is not None:
+            default = field.default_factory
+        elif field.default is not PydanticUndefined:
+            default = (lambda value: lambda: value)(field.default)
+        else:
+            default = None
+        fields.append((key, default) + _nested_model(field.annotation))
+    return tuple(fields)
+
+def encode_document(document: Dict[str, Any], model: Type[BaseModel]) -> Dict[str, Any]:
+    """Project a MongoDB document onto ``model``'s fields and make it JSON ready in one pass.
+
+    The document is trusted as-is: no validation happens, missing fields get the
+    model defaults so the output matches what ``response_model`` would produce.
+    Nested models (e.g. ``alert_classes`` stored before a field was added) get
+    their defaults the same way.
+    """
+    encoded = {}
+    for key, default, nested, is_list in _response_fields(model):
+        if key in document:
+            value = document[key]
+        elif default is not None:
+            value = default()
+        else:
+            continue
+        if nested is not None and value is not None:
+            if is_list:
+                value = [encode_document(item, nested) for item in value]
+            elif isinstance(value, dict):
+                value = encode_document(value, nested)
+        # orjson encodes datetimes natively and ObjectIds through its default hook
+        encoded[key] = value if orjson is not None else _convert(value)
+    return encoded
+
+def encode_documents(documents: Iterable[Dict[str, Any]], model: Type[BaseModel]) -> List[Dict[str, Any]]:
+    return [encode_document(document, model) for document in documents]
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default)
+        return json.dumps(
+            content,
+            default=_default,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
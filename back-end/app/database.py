@@ -5,30 +5,63 @@ import os
 
 load_dotenv()
 
+DATABASE_NAME = os.getenv("DATABASE_NAME", "fastapi_db")
+
+# URL scheme selecting the in-memory stand-in (requires the mongomock-motor package)
+MONGOMOCK_SCHEME = "mongomock://"
+
+def _int_env(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+def pool_options() -> dict:
+    """Connection pool sizing and timeouts for AsyncIOMotorClient, read from the environment"""
+    options = {
+        "maxPoolSize": _int_env("MONGODB_MAX_POOL_SIZE"),
+        "minPoolSize": _int_env("MONGODB_MIN_POOL_SIZE"),
+        "maxIdleTimeMS": _int_env("MONGODB_MAX_IDLE_TIME_MS"),
+        "waitQueueTimeoutMS": _int_env("MONGODB_WAIT_QUEUE_TIMEOUT_MS"),
+        "serverSelectionTimeoutMS": _int_env("MONGODB_SERVER_SELECTION_TIMEOUT_MS"),
+        "connectTimeoutMS": _int_env("MONGODB_CONNECT_TIMEOUT_MS"),
+        "socketTimeoutMS": _int_env("MONGODB_SOCKET_TIMEOUT_MS"),
+    }
+    return {key: value for key, value in options.items() if value is not None}
+
 class Database:
     client: Optional[AsyncIOMotorClient] = None
-    
+
     def connect_to_database(self, path: str = None):
         try:
+            if path and path.startswith(MONGOMOCK_SCHEME):
+                from mongomock_motor import AsyncMongoMockClient
+                self.client = AsyncMongoMockClient()
+                print("Connected to in-memory MongoDB stand-in.")
+                return
             if path:
-                self.client = AsyncIOMotorClient(path)
+                self.client = AsyncIOMotorClient(path, **pool_options())
             else:
                 # Default to localhost if no path provided
-                self.client = AsyncIOMotorClient("mongodb://localhost:27017")
+                self.client = AsyncIOMotorClient("mongodb://localhost:27017", **pool_options())
             print("Connected to MongoDB.")
         except Exception as e:
             print(f"Could not connect to MongoDB: {e}")
-    
+
     def close_database_connection(self):
         try:
             self.client.close()
+            self.client = None
             print("Closed connection with MongoDB.")
         except Exception as e:
             print(f"Could not close MongoDB connection: {e}")
 
+    def get_collection(self, name: str):
+        if self.client is None:
+            self.connect_to_database(os.getenv("MONGODB_URL"))
+        return self.client[DATABASE_NAME][name]
+
 # Create a database instance
 db = Database()
 
 # Get database instance
 def get_database() -> Database:
-    return db 
\ No newline at end of file
+    return db
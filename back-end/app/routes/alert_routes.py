@@ -0,0 +1,98 @@
+import asyncio
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, status
+from fastapi.responses import StreamingResponse
+from app.controllers.camera_controller import CameraController
+from app.core.alert_broker import get_alert_broker
+from app.core.security import get_current_user, verify_alert_key
+from app.schemas.alert import AlertEvent
+from app.schemas.user import UserResponse
+
+SSE_KEEPALIVE_SECONDS = 15
+
+router = APIRouter()
+camera_controller = CameraController()
+broker = get_alert_broker()
+
+async def owned_camera_ids(user_id: str, camera_id: Optional[str] = None) -> List[str]:
+    if camera_id:
+        # Raises 400/403/404 unless the user owns this camera
+        await camera_controller.get_camera_document(camera_id, user_id)
+        return [camera_id]
+    documents = await camera_controller.get_user_camera_documents(user_id)
+    return [str(document["_id"]) for document in documents]
+
+@router.post("/", status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(verify_alert_key)])
+async def publish_alert(event: AlertEvent):
+    """Publish an alert raised by a detection worker to the dashboards watching its camera"""
+    return {"delivered": broker.publish(event)}
+
+@router.get("/stream")
+async def stream_alerts(
+    camera_id: Optional[str] = None,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Server-sent events stream of alerts for the current user's cameras"""
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    user_id = str(current_user.id)
+    camera_ids = await owned_camera_ids(user_id, camera_id)
+    subscription = broker.subscribe(user_id, camera_ids, camera_id)
+
+    async def events():
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: alert\ndata: {event.model_dump_json()}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/ws")
+async def alerts_websocket(
+    websocket: WebSocket,
+    token: str = Query(...),
+    camera_id: Optional[str] = None
+):
+    """WebSocket stream of alerts for the current user's cameras, authenticated by ?token="""
+    try:
+        current_user = await get_current_user(token)
+        user_id = str(current_user.id)
+        camera_ids = await owned_camera_ids(user_id, camera_id)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = broker.subscribe(user_id, camera_ids, camera_id)
+
+    async def send_events():
+        while True:
+            event = await subscription.get()
+            await websocket.send_text(event.model_dump_json())
+
+    async def wait_for_disconnect():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+    tasks = [asyncio.create_task(send_events()), asyncio.create_task(wait_for_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscription.close()
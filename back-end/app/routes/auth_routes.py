@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from app.controllers.user_controller import UserController
-from app.schemas.user import UserCreate, UserResponse, Token
+from app.schemas.user import UserCreate, UserInDB, UserResponse, Token
 from app.core.security import create_access_token, get_current_user
 from datetime import timedelta
 
@@ -29,8 +29,5 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
-async def read_users_me(current_user: str = Depends(get_current_user)):
-    user = await controller.get_user_by_email(current_user)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user 
\ No newline at end of file
+async def read_users_me(current_user: UserInDB = Depends(get_current_user)):
+    return current_user 
\ No newline at end of file
@@ -1,8 +1,13 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+import hashlib
+import json
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 from app.controllers.camera_controller import CameraController
-from app.schemas.camera import CameraCreate, CameraResponse, CameraUpdate
-from app.core.security import get_current_user
+from app.controllers.bulk_writer import read_bulk_items
+from app.schemas.bulk import BulkWriteResponse
+from app.schemas.camera import AlertClass, CameraCreate, CameraResponse, CameraUpdate
+from app.core.security import get_current_user, verify_alert_key
+from app.core.serialization import FAST_RESPONSES, FastJSONResponse, encode_document, encode_documents
 from app.schemas.user import UserResponse
 
 router = APIRouter()
@@ -19,7 +24,21 @@ async def create_camera(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
-    return await camera_controller.create_camera(camera, current_user.id)
+    return await camera_controller.create_camera(camera, str(current_user.id))
+
+@router.post("/bulk", response_model=BulkWriteResponse)
+async def bulk_write_cameras(
+    request: Request,
+    ordered: bool = True,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Create, update or delete cameras in batches from a JSON array or an NDJSON stream"""
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    return await camera_controller.bulk_write(read_bulk_items(request), str(current_user.id), ordered)
 
 @router.get("/", response_model=List[CameraResponse])
 async def get_user_cameras(
@@ -31,7 +50,10 @@ async def get_user_cameras(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
-    return await camera_controller.get_user_cameras(current_user.id)
+    if FAST_RESPONSES:
+        documents = await camera_controller.get_user_camera_documents(str(current_user.id))
+        return FastJSONResponse(encode_documents(documents, CameraResponse))
+    return await camera_controller.get_user_cameras(str(current_user.id))
 
 @router.get("/{camera_id}", response_model=CameraResponse)
 async def get_camera(
@@ -44,7 +66,24 @@ async def get_camera(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
-    return await camera_controller.get_camera(camera_id, current_user.id)
+    if FAST_RESPONSES:
+        document = await camera_controller.get_camera_document(camera_id, str(current_user.id))
+        return FastJSONResponse(encode_document(document, CameraResponse))
+    return await camera_controller.get_camera(camera_id, str(current_user.id))
+
+@router.get("/{camera_id}/alert-classes", response_model=List[AlertClass],
+            dependencies=[Depends(verify_alert_key)])
+async def get_camera_alert_classes(
+    camera_id: str,
+    if_none_match: Optional[str] = Header(None)
+):
+    """Alert rules of a camera for its detection worker, 304 while they are unchanged"""
+    alert_classes = await camera_controller.get_camera_alert_classes(camera_id)
+    body = json.dumps([alert_class.model_dump() for alert_class in alert_classes]).encode("utf-8")
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    if if_none_match == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 @router.put("/{camera_id}", response_model=CameraResponse)
 async def update_camera(
@@ -58,7 +97,7 @@ async def update_camera(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
-    return await camera_controller.update_camera(camera_id, camera, current_user.id)
+    return await camera_controller.update_camera(camera_id, camera, str(current_user.id))
 
 @router.delete("/{camera_id}")
 async def delete_camera(
@@ -71,4 +110,4 @@ async def delete_camera(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
-    return await camera_controller.delete_camera(camera_id, current_user.id)
\ No newline at end of file
+    return await camera_controller.delete_camera(camera_id, str(current_user.id))
\ No newline at end of file
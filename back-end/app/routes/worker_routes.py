@@ -1,8 +1,11 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from app.controllers.worker_controller import WorkerController
+from app.controllers.bulk_writer import read_bulk_items
+from app.schemas.bulk import BulkWriteResponse
 from app.schemas.worker import WorkerCreate, WorkerResponse, WorkerUpdate
 from app.core.security import get_current_user
+from app.core.serialization import FAST_RESPONSES, FastJSONResponse, encode_document, encode_documents
 from app.schemas.user import UserResponse
 
 router = APIRouter()
@@ -19,7 +22,21 @@ async def create_worker(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
-    return await worker_controller.create_worker(worker, current_user.id)
+    return await worker_controller.create_worker(worker, str(current_user.id))
+
+@router.post("/bulk", response_model=BulkWriteResponse)
+async def bulk_write_workers(
+    request: Request,
+    ordered: bool = True,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Create, update or delete workers in batches from a JSON array or an NDJSON stream"""
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    return await worker_controller.bulk_write(read_bulk_items(request), str(current_user.id), ordered)
 
 @router.get("/", response_model=List[WorkerResponse])
 async def get_user_workers(
@@ -31,7 +48,10 @@ async def get_user_workers(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
-    return await worker_controller.get_user_workers(current_user.id)
+    if FAST_RESPONSES:
+        documents = await worker_controller.get_user_worker_documents(str(current_user.id))
+        return FastJSONResponse(encode_documents(documents, WorkerResponse))
+    return await worker_controller.get_user_workers(str(current_user.id))
 
 @router.get("/{worker_id}", response_model=WorkerResponse)
 async def get_worker(
@@ -44,7 +64,10 @@ async def get_worker(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
-    return await worker_controller.get_worker(worker_id, current_user.id)
+    if FAST_RESPONSES:
+        document = await worker_controller.get_worker_document(worker_id, str(current_user.id))
+        return FastJSONResponse(encode_document(document, WorkerResponse))
+    return await worker_controller.get_worker(worker_id, str(current_user.id))
 
 @router.put("/{worker_id}", response_model=WorkerResponse)
 async def update_worker(
@@ -58,7 +81,7 @@ async def update_worker(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
-    return await worker_controller.update_worker(worker_id, worker, current_user.id)
+    return await worker_controller.update_worker(worker_id, worker, str(current_user.id))
 
 @router.delete("/{worker_id}")
 async def delete_worker(
@@ -71,4 +94,4 @@ async def delete_worker(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
-    return await worker_controller.delete_worker(worker_id, current_user.id) 
\ No newline at end of file
+    return await worker_controller.delete_worker(worker_id, str(current_user.id)) 
\ No newline at end of file
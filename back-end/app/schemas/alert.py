@@ -0,0 +1,11 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class AlertEvent(BaseModel):
+    camera_id: str = Field(..., description="ID of the camera that raised the alert")
+    alert_class: str
+    confidence: Optional[float] = Field(None, ge=0.0, le=1.0)
+    count: int = Field(1, ge=1, description="Total alerts of this class raised by the camera")
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    screenshot: Optional[str] = Field(None, description="Path of the saved alert screenshot")
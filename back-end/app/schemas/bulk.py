@@ -0,0 +1,33 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+class BulkOperationType(str, Enum):
+    create = "create"
+    update = "update"
+    delete = "delete"
+
+class BulkOperation(BaseModel):
+    op: BulkOperationType = BulkOperationType.create
+    id: Optional[str] = Field(None, description="ID of the document to update or delete")
+    data: Optional[Dict[str, Any]] = Field(None, description="Create or update payload")
+
+class BulkItemStatus(str, Enum):
+    ok = "ok"
+    error = "error"
+    skipped = "skipped"
+
+class BulkItemResult(BaseModel):
+    index: int
+    op: Optional[BulkOperationType] = None
+    status: BulkItemStatus
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkWriteResponse(BaseModel):
+    ordered: bool
+    inserted_count: int = 0
+    updated_count: int = 0
+    deleted_count: int = 0
+    error_count: int = 0
+    results: List[BulkItemResult] = Field(default_factory=list)
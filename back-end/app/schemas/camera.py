@@ -6,6 +6,11 @@ class AlertClass(BaseModel):
     name: str
     confidence: float = Field(..., ge=0.0, le=1.0)
     threshold: float = Field(..., ge=0.0, le=1.0)
+    zone: Optional[List[List[float]]] = Field(
+        None, description="Polygon of [x, y] points relative to the frame (0..1) the detection must be in"
+    )
+    min_count: int = Field(1, ge=1, description="Detections needed in one frame to alert")
+    min_duration: float = Field(0.0, ge=0.0, description="Seconds the rule must hold before alerting")
 
 class CameraBase(BaseModel):
     name: str
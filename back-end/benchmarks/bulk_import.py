@@ -0,0 +1,116 @@
+"""
+Compare one-by-one camera creation with the bulk provisioning path.
+
+By default it runs against the in-memory MongoDB stand-in, so nothing else
+needs to be running. Point --mongodb-url at a local mongod to include the
+driver and the server; a throwaway database is dropped afterwards:
+
+    pip install mongomock-motor
+    cd back-end
+    python -m benchmarks.bulk_import --items 10000
+    python -m benchmarks.bulk_import --items 10000 --mongodb-url mongodb://localhost:27017
+
+Measured with the stand-in (mongomock-motor, 10k items, one CPU core):
+
+    insert_one + find_one           2000 items      6.83s         293 items/s
+    bulk_write ordered=True        10000 items      0.69s       14509 items/s
+    bulk_write ordered=False       10000 items      0.70s       14283 items/s
+    bulk_write updates             10000 items    199.47s          50 items/s
+    bulk_write deletes             10000 items    152.64s          66 items/s
+
+The stand-in has no indexes, so every update and delete filter scans the
+whole collection; on a real mongod they use the _id index.
+"""
+import argparse
+import asyncio
+import time
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.controllers.bulk_writer import BulkWriter
+from app.controllers.camera_controller import CameraController
+from app.database import MONGOMOCK_SCHEME
+from app.schemas.camera import CameraCreate, CameraUpdate
+
+def camera_payload(i: int, user_id: str) -> dict:
+    return {
+        "name": f"camera-{i}",
+        "ip": f"10.0.{i // 256 % 256}.{i % 256}:8080",
+        "user_id": user_id,
+        "alert_classes": [{"name": "Non-Helmet", "confidence": 0.4, "threshold": 0.5}],
+    }
+
+async def iterate(items):
+    for item in items:
+        yield item
+
+class BenchCameraController(CameraController):
+    """CameraController pointed straight at the benchmark collection"""
+
+    def __init__(self, collection):
+        super().__init__()
+        self._collection = collection
+
+    @property
+    def db(self):
+        return self._collection
+
+async def one_by_one(collection, items, user_id):
+    controller = BenchCameraController(collection)
+    for item in items:
+        await controller.create_camera(CameraCreate(**item), user_id)
+
+async def bulk(collection, items, user_id, ordered):
+    writer = BulkWriter(collection, user_id, CameraCreate, CameraUpdate, "camera", ordered=ordered)
+    return await writer.write_all(iterate(items))
+
+async def timed(label, count, coroutine):
+    start = time.perf_counter()
+    result = await coroutine
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {count:>7} items  {elapsed:8.2f}s  {count / elapsed:10.0f} items/s")
+    return result
+
+def connect(url: str):
+    if url.startswith(MONGOMOCK_SCHEME):
+        from mongomock_motor import AsyncMongoMockClient
+        return AsyncMongoMockClient()
+    return AsyncIOMotorClient(url)
+
+async def main(args):
+    client = connect(args.mongodb_url)
+    database = client[args.database]
+    collection = database.cameras
+    user_id = str(ObjectId())
+    items = [camera_payload(i, user_id) for i in range(args.items)]
+
+    try:
+        await collection.drop()
+        if args.items <= args.single_limit:
+            await timed("insert_one + find_one", args.items, one_by_one(collection, items, user_id))
+        else:
+            sample = items[:args.single_limit]
+            await timed("insert_one + find_one", len(sample), one_by_one(collection, sample, user_id))
+
+        for ordered in (True, False):
+            await collection.drop()
+            label = f"bulk_write ordered={ordered}"
+            await timed(label, args.items, bulk(collection, items, user_id, ordered))
+
+        ids = [document["_id"] async for document in collection.find({}, {"_id": 1})]
+        updates = [{"op": "update", "id": str(i), "data": {"name": "renamed"}} for i in ids]
+        await timed("bulk_write updates", len(updates), bulk(collection, updates, user_id, False))
+        deletes = [{"op": "delete", "id": str(i)} for i in ids]
+        await timed("bulk_write deletes", len(deletes), bulk(collection, deletes, user_id, False))
+    finally:
+        await client.drop_database(args.database)
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--single-limit", type=int, default=2000,
+                        help="Cap for the one-by-one baseline, which is slow at 10k items")
+    parser.add_argument("--mongodb-url", default="mongomock://",
+                        help="mongomock:// for the in-memory stand-in or a mongodb:// URL")
+    parser.add_argument("--database", default="fastapi_db_bench")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,199 @@
+"""
+Load-test the backend with a realistic mix of login, list, create and update traffic.
+
+By default the app runs in-process behind httpx's ASGI transport with the
+in-memory MongoDB stand-in, so nothing else needs to be running:
+
+    pip install httpx mongomock-motor
+    cd back-end
+    python -m benchmarks.loadtest --users 20 --concurrency 50 --duration 30
+
+Point --mongodb-url at a local mongod to include the driver and pool, or use
+--base-url to drive an already running server over HTTP instead.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict, List
+import httpx
+
+DEFAULT_MIX = "login=1,list_cameras=4,list_workers=2,create_camera=2,update_camera=1"
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios in --mix: {', '.join(sorted(unknown))}")
+    return weights
+
+class VirtualUser:
+    def __init__(self, index: int):
+        self.email = f"loadtest-{index}-{random.getrandbits(32):08x}@example.com"
+        self.password = "loadtest-password"
+        self.id = None
+        self.token = None
+        self.camera_ids: List[str] = []
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+def camera_payload(user: VirtualUser) -> dict:
+    return {
+        "name": f"camera-{random.getrandbits(24):06x}",
+        "ip": f"10.0.{random.randint(0, 255)}.{random.randint(0, 255)}:8080",
+        "user_id": user.id,
+        "alert_classes": [{"name": "Non-Helmet", "confidence": 0.4, "threshold": 0.5}],
+    }
+
+# Route each scenario is reported under, also when its request fails outright
+ROUTES = {
+    "login": "POST /api/auth/login",
+    "list_cameras": "GET /api/cameras/",
+    "list_workers": "GET /api/workers/",
+    "create_camera": "POST /api/cameras/",
+    "update_camera": "PUT /api/cameras/{camera_id}",
+}
+
+async def login(client: httpx.AsyncClient, user: VirtualUser):
+    response = await client.post(
+        "/api/auth/login", data={"username": user.email, "password": user.password}
+    )
+    if response.status_code == 200:
+        user.token = response.json()["access_token"]
+    return ROUTES["login"], response
+
+async def list_cameras(client: httpx.AsyncClient, user: VirtualUser):
+    return ROUTES["list_cameras"], await client.get("/api/cameras/", headers=user.headers)
+
+async def list_workers(client: httpx.AsyncClient, user: VirtualUser):
+    return ROUTES["list_workers"], await client.get("/api/workers/", headers=user.headers)
+
+async def create_camera(client: httpx.AsyncClient, user: VirtualUser):
+    response = await client.post("/api/cameras/", json=camera_payload(user), headers=user.headers)
+    if response.status_code == 200:
+        user.camera_ids.append(response.json()["_id"])
+    return ROUTES["create_camera"], response
+
+async def update_camera(client: httpx.AsyncClient, user: VirtualUser):
+    camera_id = random.choice(user.camera_ids)
+    response = await client.put(
+        f"/api/cameras/{camera_id}",
+        json={"name": f"camera-{random.getrandbits(24):06x}"},
+        headers=user.headers,
+    )
+    return ROUTES["update_camera"], response
+
+SCENARIOS = {
+    "login": login,
+    "list_cameras": list_cameras,
+    "list_workers": list_workers,
+    "create_camera": create_camera,
+    "update_camera": update_camera,
+}
+
+async def setup_user(client: httpx.AsyncClient, index: int) -> VirtualUser:
+    user = VirtualUser(index)
+    response = await client.post("/api/auth/register", json={
+        "first_name": "Load",
+        "last_name": f"Test{index}",
+        "email": user.email,
+        "password": user.password,
+    })
+    response.raise_for_status()
+    user.id = response.json()["_id"]
+    _, response = await login(client, user)
+    response.raise_for_status()
+    _, response = await create_camera(client, user)
+    response.raise_for_status()
+    return user
+
+async def run_worker(client, users, weights, deadline, samples):
+    names = list(weights)
+    scenario_weights = list(weights.values())
+    while time.perf_counter() < deadline:
+        user = random.choice(users)
+        name = random.choices(names, weights=scenario_weights)[0]
+        start = time.perf_counter()
+        try:
+            route, response = await SCENARIOS[name](client, user)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            route, ok = ROUTES[name], False
+        samples[route].append((time.perf_counter() - start, ok))
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def report(samples, elapsed: float) -> None:
+    header = f"{'route':<32} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    print(header)
+    print("-" * len(header))
+    all_latencies = []
+    total_errors = 0
+    for route in sorted(samples):
+        latencies = sorted(latency for latency, _ in samples[route])
+        errors = sum(1 for _, ok in samples[route] if not ok)
+        all_latencies.extend(latencies)
+        total_errors += errors
+        print(f"{route:<32} {len(latencies):>9} {errors:>7} {len(latencies) / elapsed:>9.1f} "
+              f"{percentile(latencies, 0.50) * 1000:>8.1f} {percentile(latencies, 0.95) * 1000:>8.1f} "
+              f"{percentile(latencies, 0.99) * 1000:>8.1f} {latencies[-1] * 1000:>8.1f}")
+    all_latencies.sort()
+    print("-" * len(header))
+    print(f"{'total':<32} {len(all_latencies):>9} {total_errors:>7} {len(all_latencies) / elapsed:>9.1f} "
+          f"{percentile(all_latencies, 0.50) * 1000:>8.1f} {percentile(all_latencies, 0.95) * 1000:>8.1f} "
+          f"{percentile(all_latencies, 0.99) * 1000:>8.1f} {all_latencies[-1] * 1000 if all_latencies else 0:>8.1f}")
+
+@asynccontextmanager
+async def open_client(args):
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+            yield client
+        return
+
+    # The app reads MONGODB_URL when its lifespan starts
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            yield client
+
+async def main(args):
+    weights = parse_mix(args.mix)
+    async with open_client(args) as client:
+        users = await asyncio.gather(*(setup_user(client, i) for i in range(args.users)))
+        samples = defaultdict(list)
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(
+            run_worker(client, users, weights, deadline, samples) for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+    print(f"{args.users} users, {args.concurrency} concurrent clients, {elapsed:.1f}s, mix: {args.mix}")
+    report(samples, elapsed)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of measured traffic")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Comma separated scenario=weight pairs")
+    parser.add_argument("--mongodb-url", default="mongomock://",
+                        help="mongomock:// for the in-memory stand-in or a mongodb:// URL")
+    parser.add_argument("--base-url", help="Drive a running server over HTTP instead of in-process")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(main(parser.parse_args()))
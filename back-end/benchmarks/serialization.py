@@ -0,0 +1,73 @@
+"""
+Compare the response_model serialization path with the FAST_RESPONSES fast path.
+
+Uses synthetic camera documents shaped like the ones stored in MongoDB, so no
+database is needed:
+
+    cd back-end
+    python -m benchmarks.serialization --sizes 1000 10000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from typing import List
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.core.serialization import FastJSONResponse, encode_documents, orjson
+from app.schemas.camera import CameraResponse
+
+def camera_documents(count: int) -> List[dict]:
+    user_id = str(ObjectId())
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"camera-{i}",
+            "ip": f"10.0.{i // 256 % 256}.{i % 256}:8080",
+            "user_id": user_id,
+            "alert_classes": [
+                {"name": "Non-Helmet", "confidence": 0.4, "threshold": 0.5},
+                {"name": "no-vest", "confidence": 0.4, "threshold": 0.6},
+            ],
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+async def current_path(documents, field):
+    # What the list endpoint does today: build models, then FastAPI validates and serializes them again
+    cameras = [CameraResponse(**document) for document in documents]
+    content = await serialize_response(field=field, response_content=cameras)
+    return JSONResponse(content).body
+
+async def fast_path(documents, _field):
+    return FastJSONResponse(encode_documents(documents, CameraResponse)).body
+
+def measure(label, runner, documents, field, repeat):
+    best = float("inf")
+    body = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = asyncio.run(runner(documents, field))
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<16} {len(documents):>7} docs  {best * 1000:9.1f} ms  {len(body) / 1024:9.0f} KiB")
+    return best
+
+def main(args):
+    field = create_response_field(name="Response_get_user_cameras", type_=List[CameraResponse])
+    print(f"JSON encoder for the fast path: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    for size in args.sizes:
+        documents = camera_documents(size)
+        baseline = measure("response_model", current_path, documents, field, args.repeat)
+        fast = measure("fast path", fast_path, documents, field, args.repeat)
+        print(f"{'speedup':<16} {size:>7} docs  {baseline / fast:9.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
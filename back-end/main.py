@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import router
@@ -7,10 +8,18 @@ import os
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Initialize database connection
+    db.connect_to_database(os.getenv("MONGODB_URL"))
+    yield
+    db.close_database_connection()
+
 app = FastAPI(
     title="FastAPI Backend",
     description="A well-structured FastAPI backend server",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -22,15 +31,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize database connection
-@app.on_event("startup")
-async def startup_db_client():
-    db.connect_to_database(os.getenv("MONGODB_URL"))
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    db.close_database_connection()
-
 # Include routers
 app.include_router(router, prefix="/api")
 
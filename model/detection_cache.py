@@ -0,0 +1,222 @@
+"""
+Columnar on-disk cache of raw per-frame YOLO detections.
+
+Running the model over a video is by far the slowest part of the
+process_video_* experiments. The cache runs it once at a low confidence floor
+and keeps every surviving box, so confidence thresholds, alert classes and
+counting rules can be re-evaluated over hours of footage in seconds.
+
+Entries are keyed by the video's content hash, the weights' hash and the
+inference settings. NMS runs inside the model call, so ``iou`` is part of the
+key rather than something that can be re-tuned from the cache.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+import cv2
+import numpy as np
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / "detection_cache"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+# Boxes below this score are never stored, no alert rule goes that low
+RAW_CONF = 0.01
+
+COLUMNS = ("frame_offsets", "boxes", "scores", "classes")
+
+def file_sha256(path: Union[str, Path], chunk_size: int = 8 * 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while True:
+            chunk = handle.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cache_key(video_hash: str, weights_hash: str, settings: dict) -> str:
+    payload = json.dumps(
+        {"version": CACHE_VERSION, "video": video_hash, "weights": weights_hash, "settings": settings},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+class CachedDetections:
+    """Memory-mapped detection columns for one video.
+
+    Detections of frame ``i`` are rows ``frame_offsets[i]:frame_offsets[i + 1]``
+    of ``boxes`` (x1, y1, x2, y2), ``scores`` and ``classes``.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.meta = json.loads((directory / "meta.json").read_text())
+        self.names: Dict[int, str] = {int(k): v for k, v in self.meta["names"].items()}
+        self.fps = self.meta["fps"]
+        self.frame_offsets = np.load(directory / "frame_offsets.npy", mmap_mode="r")
+        self.boxes = np.load(directory / "boxes.npy", mmap_mode="r")
+        self.scores = np.load(directory / "scores.npy", mmap_mode="r")
+        self.classes = np.load(directory / "classes.npy", mmap_mode="r")
+        self._frame_index = None
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.frame_offsets) - 1
+
+    @property
+    def frame_index(self) -> np.ndarray:
+        """Frame number of every detection row"""
+        if self._frame_index is None:
+            self._frame_index = np.repeat(
+                np.arange(self.frame_count, dtype=np.int32), np.diff(self.frame_offsets)
+            )
+        return self._frame_index
+
+    def frame(self, i: int):
+        rows = slice(self.frame_offsets[i], self.frame_offsets[i + 1])
+        return self.boxes[rows], self.scores[rows], self.classes[rows]
+
+    def class_ids(self, class_names: Iterable[str]) -> np.ndarray:
+        wanted = {name.lower() for name in class_names}
+        return np.array([i for i, name in self.names.items() if name.lower() in wanted], dtype=np.int16)
+
+    def select(self, conf: float, class_names: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Boolean row mask of detections above ``conf``, optionally limited to ``class_names``"""
+        mask = self.scores > conf
+        if class_names is not None:
+            mask &= np.isin(self.classes, self.class_ids(class_names))
+        return mask
+
+    def counts_per_frame(self, mask: np.ndarray) -> np.ndarray:
+        return np.bincount(self.frame_index[mask], minlength=self.frame_count)
+
+    def class_counts(self, conf: float, class_names: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Total detections above ``conf`` for every selected class (all classes by default), zeros included"""
+        mask = self.select(conf, class_names)
+        counts = np.bincount(self.classes[mask].astype(np.int64), minlength=max(self.names) + 1)
+        selected = self.names if class_names is None else self.class_ids(class_names)
+        return {self.names[int(i)]: int(counts[i]) for i in selected}
+
+    def alert_frames(self, alert_classes: Iterable[str], conf: float = 0.5, cooldown: float = 0.0) -> np.ndarray:
+        """Frame numbers that would raise an alert, with an optional cooldown in seconds"""
+        frames = np.flatnonzero(self.counts_per_frame(self.select(conf, alert_classes)))
+        if cooldown <= 0 or len(frames) == 0:
+            return frames
+        min_gap = cooldown * (self.fps or 1.0)
+        kept = [frames[0]]
+        for frame in frames[1:]:
+            if frame - kept[-1] > min_gap:
+                kept.append(frame)
+        return np.array(kept, dtype=frames.dtype)
+
+class DetectionCache:
+    """Directory of cache entries, evicted least recently used first past ``max_bytes``"""
+
+    def __init__(self, directory: Union[str, Path] = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.hashes_path = self.directory / "file_hashes.json"
+        self._hashes = json.loads(self.hashes_path.read_text()) if self.hashes_path.exists() else {}
+
+    def file_hash(self, path: Union[str, Path]) -> str:
+        """Content hash of ``path``, only recomputed when its size or mtime changed"""
+        path = Path(path).resolve()
+        stat = path.stat()
+        signature = [stat.st_size, stat.st_mtime_ns]
+        cached = self._hashes.get(str(path))
+        if cached and cached["signature"] == signature:
+            return cached["sha256"]
+        digest = file_sha256(path)
+        self._hashes[str(path)] = {"signature": signature, "sha256": digest}
+        # Written aside and swapped in, a crash mid-write must not leave a truncated file
+        staging = self.hashes_path.with_name(f".{self.hashes_path.name}.{os.getpid()}.tmp")
+        staging.write_text(json.dumps(self._hashes))
+        os.replace(staging, self.hashes_path)
+        return digest
+
+    def get(self, key: str) -> Optional[CachedDetections]:
+        entry = self.directory / key
+        if not (entry / "meta.json").exists():
+            return None
+        # The entry directory's mtime is its last use for LRU eviction
+        os.utime(entry, None)
+        return CachedDetections(entry)
+
+    def put(self, key: str, columns: Dict[str, np.ndarray], meta: dict) -> CachedDetections:
+        entry = self.directory / key
+        staging = self.directory / f".{key}.{os.getpid()}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+        for name in COLUMNS:
+            np.save(staging / f"{name}.npy", columns[name])
+        (staging / "meta.json").write_text(json.dumps(meta))
+
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(staging, entry)
+        self.evict(keep=key)
+        return CachedDetections(entry)
+
+    def evict(self, keep: Optional[str] = None):
+        entries = []
+        for entry in self.directory.iterdir():
+            if entry.is_dir() and not entry.name.startswith("."):
+                size = sum(f.stat().st_size for f in entry.iterdir())
+                entries.append((entry.stat().st_mtime, size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry.name == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def detect_video(self, model, video_path: Union[str, Path], weights_path: Union[str, Path],
+                     iou: float = 0.7, imgsz: int = 640, conf: float = RAW_CONF, **predict_args) -> CachedDetections:
+        """Raw detections for every frame of ``video_path``, running the model only on a cache miss"""
+        settings = {"iou": iou, "imgsz": imgsz, "conf": conf, **predict_args}
+        key = cache_key(self.file_hash(video_path), self.file_hash(weights_path), settings)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            raise IOError(f"Error opening video file: {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS)
+
+        offsets = [0]
+        boxes, scores, classes = [], [], []
+        started = time.time()
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            result = model(frame, verbose=False, conf=conf, iou=iou, imgsz=imgsz, **predict_args)[0]
+            frame_boxes = result.boxes
+            boxes.append(frame_boxes.xyxy.cpu().numpy().astype(np.float32))
+            scores.append(frame_boxes.conf.cpu().numpy().astype(np.float32))
+            classes.append(frame_boxes.cls.cpu().numpy().astype(np.int16))
+            offsets.append(offsets[-1] + len(frame_boxes))
+        cap.release()
+
+        columns = {
+            "frame_offsets": np.array(offsets, dtype=np.int64),
+            "boxes": np.concatenate(boxes) if boxes else np.zeros((0, 4), dtype=np.float32),
+            "scores": np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32),
+            "classes": np.concatenate(classes) if classes else np.zeros(0, dtype=np.int16),
+        }
+        meta = {
+            "video": str(video_path),
+            "weights": str(weights_path),
+            "settings": settings,
+            "names": {int(k): v for k, v in model.names.items()},
+            "fps": fps,
+            "inference_seconds": round(time.time() - started, 2),
+        }
+        return self.put(key, columns, meta)
@@ -0,0 +1,60 @@
+import json
+import logging
+import threading
+import urllib.request
+from queue import Empty, Full, Queue
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class AlertPublisher:
+    """Forwards alert events to the backend's /api/alerts/ endpoint from a background thread.
+
+    publish() never blocks the detection loop: when the backend is slow or down,
+    events beyond ``max_pending`` are dropped and counted.
+    """
+
+    def __init__(self, url: str, ingest_key: Optional[str] = None, max_pending: int = 100, timeout: float = 2.0):
+        self.url = url
+        self.ingest_key = ingest_key
+        self.timeout = timeout
+        self.queue = Queue(maxsize=max_pending)
+        self.dropped = 0
+        self.sent = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+
+    def publish(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except Full:
+            self.dropped += 1
+
+    def _run(self):
+        while self._running:
+            try:
+                event = self.queue.get(timeout=0.5)
+            except Empty:
+                continue
+
+            request = urllib.request.Request(
+                self.url,
+                data=json.dumps(event).encode("utf-8"),
+                headers={"Content-Type": "application/json", "X-Alert-Key": self.ingest_key or ""},
+                method="POST",
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout):
+                    self.sent += 1
+            except Exception as e:
+                logger.error(f"Could not publish alert: {str(e)}")
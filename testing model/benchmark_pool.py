@@ -0,0 +1,83 @@
+"""
+Aggregate CPU throughput of the inference worker pool against one in-process
+model on a video.
+
+Every configuration infers the same frames, decoding is not timed. The
+in-process baseline gives torch every core as intra-op threads; a pool of N
+workers pins each worker to its share of the cores. The video defaults to
+PPE_realtime_demo.mp4 at the repository root.
+
+    python benchmark_pool.py --weights epoch49.pt --workers 1,2,4
+
+Measured on a single-core container with randomly initialised yolov8n.yaml
+weights (the cost per frame matches trained weights, detections do not),
+150 frames of the demo video:
+
+    in-process    1 threads         12.0 fps
+    pool          1 x  1 threads     12.5 fps  (1.04x)
+    pool          2 x  1 threads     10.6 fps  (0.88x)
+
+With one core the workers share it, so this only shows the handoff costs
+nothing; scaling with cores needs a run on a multi-core host.
+"""
+import argparse
+import os
+import time
+import torch
+from ultralytics import YOLO
+from benchmark_cascade import DEMO_VIDEO, read_frames
+from inference_pool import InferencePool
+
+def in_process_fps(weights: str, frames, imgsz: int, inference_args: dict) -> float:
+    model = YOLO(weights)
+    model.fuse()
+    for frame in frames[:3]:
+        model(frame, verbose=False, device="cpu", imgsz=imgsz, **inference_args)
+    started = time.perf_counter()
+    for frame in frames:
+        model(frame, verbose=False, device="cpu", imgsz=imgsz, **inference_args)
+    return len(frames) / (time.perf_counter() - started)
+
+def pool_fps(pool: InferencePool, frames) -> float:
+    """Frames per second with every slot kept busy, in any completion order"""
+    submitted = done = 0
+    started = time.perf_counter()
+    while done < len(frames):
+        while submitted < len(frames) and pool.has_free_slot():
+            pool.submit(frames[submitted])
+            submitted += 1
+        _, slot, _ = pool.collect()
+        pool.release(slot)
+        done += 1
+    return len(frames) / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--weights", required=True, help="model weights")
+    parser.add_argument("--video", default=os.path.normpath(DEMO_VIDEO))
+    parser.add_argument("--workers", default="1,2,4", help="comma separated pool sizes")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--max-frames", type=int, default=300)
+    args = parser.parse_args()
+
+    inference_args = {"conf": 0.4, "iou": 0.4}
+    frames = list(read_frames(args.video, args.max_frames))
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    print(f"{os.path.basename(args.video)}: {len(frames)} frames, {cores} cores, imgsz {args.imgsz}\n")
+
+    torch.set_num_threads(cores)
+    baseline = in_process_fps(args.weights, frames, args.imgsz, inference_args)
+    print(f"{'in-process':12s} {cores:2d} threads      {baseline:7.1f} fps")
+
+    for workers in (int(n) for n in args.workers.split(",")):
+        pool = InferencePool(args.weights, workers, args.imgsz, inference_args=inference_args)
+        try:
+            pool_fps(pool, frames[:2 * workers])  # warm-up
+            fps = pool_fps(pool, frames)
+        finally:
+            pool.close()
+        threads = max(1, cores // workers)
+        print(f"{'pool':12s} {workers:2d} x {threads:2d} threads  {fps:7.1f} fps  ({fps / baseline:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import time
+from typing import Dict, List, Optional
+import cv2
+import numpy as np
+from detections import X1, Y2, CONF, CLS, box_iou, boxes_to_array, empty_detections
+
+class Track:
+    """A tracked person and the PPE verdict last inferred on its crop"""
+
+    def __init__(self, track_id: int, box: np.ndarray, conf: float):
+        self.id = track_id
+        self.box = box
+        self.conf = conf
+        self.missed = 0
+        self.thumbnail = None  # grayscale crop the verdict was inferred on
+        # PPE detections with coordinates relative to the person box (0..1),
+        # so they follow the person until the crop is inferred again
+        self.ppe: Optional[np.ndarray] = None
+        self.ppe_time = 0.0
+
+    def project_ppe(self) -> np.ndarray:
+        if self.ppe is None or len(self.ppe) == 0:
+            return empty_detections()
+        origin = np.tile(self.box[:2], 2)
+        size = np.tile(self.box[2:] - self.box[:2], 2)
+        detections = self.ppe.copy()
+        detections[:, X1:Y2 + 1] = origin + detections[:, X1:Y2 + 1] * size
+        return detections
+
+class IouTracker:
+    """Greedy IoU association of person boxes across frames"""
+
+    def __init__(self, iou_threshold: float = 0.3, max_missed: int = 10):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.tracks: List[Track] = []
+        self._next_id = 0
+
+    def update(self, persons: np.ndarray) -> List[Track]:
+        """Match this frame's (N, 6) person detections, returns the tracks seen in it"""
+        unmatched = set(range(len(persons)))
+        matched_tracks = set()
+        seen = []
+        if self.tracks and len(persons):
+            iou = box_iou(np.array([track.box for track in self.tracks]), persons)
+            for flat in np.argsort(-iou, axis=None):
+                t, p = np.unravel_index(flat, iou.shape)
+                if iou[t, p] < self.iou_threshold:
+                    break
+                if t in matched_tracks or p not in unmatched:
+                    continue
+                track = self.tracks[t]
+                track.box = persons[p, X1:Y2 + 1].copy()
+                track.conf = float(persons[p, CONF])
+                track.missed = 0
+                unmatched.discard(p)
+                matched_tracks.add(t)
+                seen.append(track)
+
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.missed += 1
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+
+        for p in sorted(unmatched):
+            track = Track(self._next_id, persons[p, X1:Y2 + 1].copy(), float(persons[p, CONF]))
+            self._next_id += 1
+            self.tracks.append(track)
+            seen.append(track)
+        return seen
+
+class PPECascade:
+    """Person detector and tracker at full rate, PPE model only on person crops that need it.
+
+    A track's crop is sent to the PPE model when the track is new, when its
+    crop changed by more than ``change_threshold`` (mean absolute difference
+    of a small grayscale thumbnail) or when its verdict is older than
+    ``stale_after`` seconds. All such crops of a frame go through the PPE
+    model as one batch; every other track reuses its cached verdict.
+    """
+
+    def __init__(self, person_model, device, person_conf: float = 0.4, crop_imgsz: int = 320,
+                 stale_after: float = 1.0, change_threshold: float = 0.08, pad: float = 0.1,
+                 max_batch: int = 16, tracker: Optional[IouTracker] = None):
+        self.person_model = person_model
+        self.device = device
+        self.person_conf = person_conf
+        self.crop_imgsz = crop_imgsz
+        self.stale_after = stale_after
+        self.change_threshold = change_threshold
+        self.pad = pad
+        self.max_batch = max_batch
+        self.tracker = tracker or IouTracker()
+        self._ppe_model = None
+        self.person_class = self._class_id(person_model.names, "person")
+        if self.person_class is None:
+            raise ValueError("The person model has no person class")
+        self.stats = {"frames": 0, "persons": 0, "crops_inferred": 0, "crops_reused": 0, "ppe_batches": 0}
+
+    @staticmethod
+    def _class_id(names: Dict[int, str], wanted: str) -> Optional[int]:
+        for class_id, name in names.items():
+            if name.lower() == wanted:
+                return class_id
+        return None
+
+    def _thumbnail(self, frame: np.ndarray, box: np.ndarray) -> np.ndarray:
+        x1, y1, x2, y2 = box.astype(np.int32)
+        crop = frame[max(y1, 0):max(y2, y1 + 1), max(x1, 0):max(x2, x1 + 1)]
+        if crop.size == 0:
+            return np.zeros((32, 16), dtype=np.uint8)
+        return cv2.cvtColor(cv2.resize(crop, (16, 32), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+
+    def _needs_ppe(self, track: Track, thumbnail: np.ndarray, now: float) -> bool:
+        if track.ppe is None or now - track.ppe_time > self.stale_after:
+            return True
+        change = float(cv2.absdiff(thumbnail, track.thumbnail).mean()) / 255.0
+        return change > self.change_threshold
+
+    def _crop_bounds(self, box: np.ndarray, frame_shape) -> np.ndarray:
+        height, width = frame_shape[:2]
+        pad = (box[2:] - box[:2]) * self.pad
+        bounds = np.concatenate([box[:2] - pad, box[2:] + pad]).round().astype(np.int32)
+        bounds = np.clip(bounds, 0, [width - 1, height - 1, width, height])
+        bounds[2:] = np.maximum(bounds[2:], bounds[:2] + 1)
+        return bounds
+
+    def detect(self, frame: np.ndarray, ppe_model, inference_args: dict) -> np.ndarray:
+        """Detections of one frame in the PPE model's class space, like a full-frame call"""
+        now = time.monotonic()
+        if ppe_model is not self._ppe_model:
+            # Verdicts of a swapped-out model may use other class ids
+            self.reset()
+            self._ppe_model = ppe_model
+        result = self.person_model(frame, verbose=False, device=self.device, conf=self.person_conf,
+                                   classes=[self.person_class], half=inference_args.get("half", False))[0]
+        tracks = self.tracker.update(boxes_to_array(result.boxes))
+        self.stats["frames"] += 1
+        self.stats["persons"] += len(tracks)
+
+        pending = []
+        for track in tracks:
+            thumbnail = self._thumbnail(frame, track.box)
+            if self._needs_ppe(track, thumbnail, now):
+                pending.append((track, thumbnail))
+            else:
+                self.stats["crops_reused"] += 1
+
+        ppe_person_class = self._class_id(ppe_model.names, "person")
+        for start in range(0, len(pending), self.max_batch):
+            batch = pending[start:start + self.max_batch]
+            bounds = [self._crop_bounds(track.box, frame.shape) for track, _ in batch]
+            crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in bounds]
+            results = ppe_model(crops, verbose=False, device=self.device, imgsz=self.crop_imgsz, **inference_args)
+            self.stats["ppe_batches"] += 1
+            self.stats["crops_inferred"] += len(batch)
+
+            for (track, thumbnail), (x1, y1, _, _), crop_result in zip(batch, bounds, results):
+                detections = boxes_to_array(crop_result.boxes)
+                if ppe_person_class is not None:
+                    # The tracked box stands in for the person, not a crop-level guess
+                    detections = detections[detections[:, CLS] != ppe_person_class]
+                origin = np.tile(track.box[:2], 2)
+                size = np.maximum(np.tile(track.box[2:] - track.box[:2], 2), 1.0)
+                detections[:, X1:Y2 + 1] = (detections[:, X1:Y2 + 1] + [x1, y1, x1, y1] - origin) / size
+                track.ppe = detections
+                track.ppe_time = now
+                track.thumbnail = thumbnail
+
+        output = [track.project_ppe() for track in tracks]
+        if ppe_person_class is not None and tracks:
+            persons = np.array([list(track.box) + [track.conf, ppe_person_class] for track in tracks],
+                               dtype=np.float32)
+            output.append(persons)
+        return np.concatenate(output) if output else empty_detections()
+
+    def reset(self):
+        """Forget cached verdicts, e.g. after the PPE model was swapped"""
+        for track in self.tracker.tracks:
+            track.ppe = None
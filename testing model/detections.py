@@ -0,0 +1,43 @@
+import numpy as np
+
+# Column layout of a detection array: one row per box
+X1, Y1, X2, Y2, CONF, CLS = range(6)
+
+def empty_detections() -> np.ndarray:
+    return np.zeros((0, 6), dtype=np.float32)
+
+def boxes_to_array(boxes) -> np.ndarray:
+    """Convert ultralytics Boxes to an (N, 6) float32 array of x1, y1, x2, y2, conf, cls"""
+    if boxes is None or len(boxes) == 0:
+        return empty_detections()
+    return np.concatenate([
+        boxes.xyxy.cpu().numpy(),
+        boxes.conf.cpu().numpy()[:, None],
+        boxes.cls.cpu().numpy()[:, None],
+    ], axis=1).astype(np.float32, copy=False)
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of the x1, y1, x2, y2 boxes of two detection arrays, shape (len(a), len(b))"""
+    top_left = np.maximum(a[:, None, X1:Y1 + 1], b[None, :, X1:Y1 + 1])
+    bottom_right = np.minimum(a[:, None, X2:Y2 + 1], b[None, :, X2:Y2 + 1])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, X2:Y2 + 1] - a[:, X1:Y1 + 1], axis=1)
+    area_b = np.prod(b[:, X2:Y2 + 1] - b[:, X1:Y1 + 1], axis=1)
+    return intersection / np.maximum(area_a[:, None] + area_b[None, :] - intersection, 1e-9)
+
+def match_detections(reference: np.ndarray, candidate: np.ndarray, iou_threshold: float = 0.5) -> int:
+    """Greedily match candidate boxes, most confident first, to same-class reference boxes.
+
+    Returns the number of matched pairs.
+    """
+    if len(reference) == 0 or len(candidate) == 0:
+        return 0
+    iou = box_iou(reference, candidate)
+    iou[reference[:, None, CLS] != candidate[None, :, CLS]] = 0.0
+    used = np.zeros(len(reference), dtype=bool)
+    for j in np.argsort(-candidate[:, CONF]):
+        overlaps = np.where(used, 0.0, iou[:, j])
+        i = int(np.argmax(overlaps))
+        if overlaps[i] >= iou_threshold:
+            used[i] = True
+    return int(used.sum())
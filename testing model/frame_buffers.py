@@ -0,0 +1,162 @@
+import sys
+import threading
+from collections import deque
+from typing import Optional, Tuple
+import cv2
+import numpy as np
+import torch
+
+def fit_to_stride(width: int, height: int, imgsz: int, stride: int = 32) -> Tuple[int, int]:
+    """Scale (width, height) so the long side is ``imgsz`` and both sides are stride multiples.
+
+    Frames of that size go through the model without any letterbox padding.
+    """
+    scale = imgsz / max(width, height)
+    return (max(stride, int(round(width * scale / stride)) * stride),
+            max(stride, int(round(height * scale / stride)) * stride))
+
+class FrameBufferPool:
+    """Reusable uint8 frame buffers of one shape.
+
+    acquire() hands out a free buffer and only allocates when every buffer is in
+    use; release() is called once the frame has been encoded or dropped.
+    """
+
+    def __init__(self, shape: Tuple[int, int, int], count: int = 4):
+        self.shape = tuple(shape)
+        # Every buffer the pool handed out; ownership is checked by identity, not id(),
+        # which CPython reuses once an array is freed
+        self._buffers = [np.empty(self.shape, dtype=np.uint8) for _ in range(count)]
+        self._free = deque(self._buffers)
+        self._lock = threading.Lock()
+        self.allocations = count
+        self.reuses = 0
+
+    def acquire(self) -> np.ndarray:
+        with self._lock:
+            if self._free:
+                self.reuses += 1
+                return self._free.popleft()
+            buffer = np.empty(self.shape, dtype=np.uint8)
+            self._buffers.append(buffer)
+            self.allocations += 1
+            return buffer
+
+    def owns(self, buffer: Optional[np.ndarray]) -> bool:
+        return buffer is not None and any(buffer is owned for owned in self._buffers)
+
+    def release(self, buffer: Optional[np.ndarray]):
+        with self._lock:
+            if not self.owns(buffer) or any(buffer is free for free in self._free):
+                return
+            self._free.append(buffer)
+
+class FrameReader:
+    """Decodes a VideoCapture straight into pooled buffers at the pool's frame size.
+
+    When the source already delivers that size, OpenCV decodes in place into the
+    pooled buffer. Otherwise the decoder output is kept and reused, and resized
+    into the pooled buffer right after decoding.
+    """
+
+    def __init__(self, cap, pool: FrameBufferPool):
+        self.cap = cap
+        self.pool = pool
+        self.size = (pool.shape[1], pool.shape[0])
+        self.direct = False
+        self.decoded = None
+        self.decoder_allocations = 0
+
+    def read(self) -> Optional[np.ndarray]:
+        frame = self.pool.acquire()
+        ret, decoded = self.cap.read(frame if self.direct else self.decoded)
+        if not ret:
+            self.pool.release(frame)
+            return None
+        if decoded is frame:
+            return frame
+        return self._fill(frame, decoded)
+
+    def adopt(self, decoded: np.ndarray) -> np.ndarray:
+        """Pooled copy of a frame decoded before the reader existed, e.g. to size the pool"""
+        return self._fill(self.pool.acquire(), decoded)
+
+    def _fill(self, frame: np.ndarray, decoded: np.ndarray) -> np.ndarray:
+        if decoded is not self.decoded:
+            self.decoder_allocations += 1
+            self.decoded = decoded
+        if decoded.shape == frame.shape:
+            np.copyto(frame, decoded)
+            self.direct = True
+        else:
+            cv2.resize(decoded, self.size, dst=frame, interpolation=cv2.INTER_AREA)
+            self.direct = False
+        return frame
+
+class ModelInput:
+    """Persistent (1, 3, H, W) input tensor frames are normalized into, bypassing letterboxing"""
+
+    def __init__(self, shape: Tuple[int, int, int], device: torch.device, half: bool = False):
+        height, width = shape[:2]
+        self.device = device
+        self.tensor = torch.empty((1, 3, height, width), device=device,
+                                  dtype=torch.float16 if half else torch.float32)
+        if device.type == 'cuda':
+            self.host = torch.empty((height, width, 3), dtype=torch.uint8, pin_memory=True)
+            self.host_array = self.host.numpy()
+            self.staging = torch.empty((height, width, 3), dtype=torch.uint8, device=device)
+
+    def fill(self, frame: np.ndarray) -> torch.Tensor:
+        if self.device.type == 'cuda':
+            np.copyto(self.host_array, frame)
+            self.staging.copy_(self.host, non_blocking=True)
+            source = self.staging
+        else:
+            source = torch.from_numpy(frame)
+
+        # BGR HWC uint8 -> RGB CHW float, one strided copy per channel
+        for channel in range(3):
+            self.tensor[0, channel].copy_(source[..., 2 - channel])
+        self.tensor.mul_(1 / 255.0)
+        return self.tensor
+
+class EncodeBuffer:
+    """Growable byte buffer the multipart MJPEG chunks are assembled in"""
+
+    def __init__(self, header: bytes, trailer: bytes, capacity: int = 256 * 1024):
+        self.header = np.frombuffer(header, dtype=np.uint8)
+        self.trailer = np.frombuffer(trailer, dtype=np.uint8)
+        self.buffer = np.empty(capacity, dtype=np.uint8)
+        self.allocations = 1
+
+    def wrap(self, jpeg: np.ndarray) -> memoryview:
+        jpeg = jpeg.reshape(-1)
+        start = len(self.header)
+        end = start + jpeg.size
+        size = end + len(self.trailer)
+        if size > self.buffer.size:
+            self.buffer = np.empty(int(size * 1.5), dtype=np.uint8)
+            self.allocations += 1
+        self.buffer[:start] = self.header
+        self.buffer[start:end] = jpeg
+        self.buffer[end:size] = self.trailer
+        return memoryview(self.buffer)[:size]
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of the whole process in MiB, None when the platform can't tell.
+
+    Every camera app, model and thread in the process counts towards it.
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and KiB on Linux
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
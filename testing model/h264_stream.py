@@ -0,0 +1,336 @@
+import logging
+import os
+import shutil
+import struct
+import subprocess
+import threading
+import time
+from collections import deque
+from queue import Empty, Full, Queue
+from typing import Optional, Tuple
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Top-level MP4 boxes that make up the init segment every viewer starts with
+INIT_BOXES = (b"ftyp", b"moov")
+
+def _child_boxes(payload: bytes):
+    """(type, payload) of the boxes directly inside a container box's payload"""
+    offset = 0
+    while offset + 8 <= len(payload):
+        size, box_type = struct.unpack_from(">I4s", payload, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", payload, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = len(payload) - offset
+        if size < header:
+            break
+        yield box_type, payload[offset + header:offset + size]
+        offset += size
+
+def sample_count(moof: bytes) -> int:
+    """Number of frames in a fragment, summed over the trun boxes of its moof"""
+    count = 0
+    for box_type, traf in _child_boxes(moof[8:]):
+        if box_type != b"traf":
+            continue
+        for child_type, payload in _child_boxes(traf):
+            if child_type == b"trun":
+                # Full box: version and flags, then the sample count
+                count += struct.unpack_from(">I", payload, 4)[0]
+    return count
+
+class StreamMeter:
+    """Bytes sent and frame delay of one output path over a sliding window"""
+
+    def __init__(self, window: float = 10.0):
+        self.window = window
+        self.samples = deque()  # (time, bytes)
+        self.delays_ms = deque(maxlen=500)
+        self.total_bytes = 0
+
+    def add(self, size: int, delay: Optional[float] = None):
+        now = time.monotonic()
+        self.samples.append((now, size))
+        self.total_bytes += size
+        while self.samples and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+        if delay is not None:
+            self.delays_ms.append(delay * 1000)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        recent = sum(size for ts, size in self.samples if now - ts <= self.window)
+        delays = np.array(self.delays_ms) if self.delays_ms else None
+        return {
+            "bitrate_kbps": round(recent * 8 / self.window / 1000, 1),
+            "total_bytes": self.total_bytes,
+            "delay_ms": {
+                "p50": round(float(np.percentile(delays, 50)), 1) if delays is not None else None,
+                "p95": round(float(np.percentile(delays, 95)), 1) if delays is not None else None,
+            },
+        }
+
+class H264Stream:
+    """Encodes frames once with ffmpeg into fragmented MP4 for any number of viewers, plus HLS.
+
+    libx264 runs with the ultrafast preset and zerolatency tune (no B-frames,
+    no lookahead). Frames are stamped with their arrival time and a keyframe
+    is forced every ``gop_seconds`` of those timestamps, so the interval holds
+    however the frame rate varies with the scheduler. Fragments are cut at
+    keyframes, so every fragment is a valid starting point: a new viewer gets
+    the cached init segment (ftyp + moov) and then the next fragment. A viewer
+    that falls behind is disconnected rather than skipping fragments, since a
+    gap in the decode timeline stalls MSE players; it reconnects from the next
+    keyframe. The same encode is also written as an HLS playlist with fMP4
+    segments into ``hls_dir`` through ffmpeg's tee muxer. Without a
+    ``frame_size`` the first frame written sets it, and ffmpeg is started then.
+    """
+
+    def __init__(self, frame_size: Optional[Tuple[int, int]] = None, bitrate: str = "1M",
+                 gop_seconds: float = 0.5, hls_dir: Optional[str] = None, hls_segment_seconds: float = 1.0,
+                 hls_list_size: int = 6, ffmpeg: str = "ffmpeg", max_pending: int = 4):
+        self.frame_size = tuple(frame_size) if frame_size else None
+        self.bitrate = bitrate
+        self.gop_seconds = gop_seconds
+        self.hls_dir = hls_dir
+        self.hls_segment_seconds = hls_segment_seconds
+        self.hls_list_size = hls_list_size
+        self.ffmpeg = ffmpeg
+        self.frames = Queue(maxsize=max_pending)
+        self.meter = StreamMeter()
+        self.init_segment = None
+        self.frames_encoded = 0
+        self.frames_dropped = 0
+        self.fragments = 0
+        self.viewers_dropped = 0
+        self._written_at = deque()  # write time of every frame not yet in a fragment
+        self._viewers = set()
+        self._viewers_lock = threading.Lock()
+        self._process = None
+        self._running = False
+        self._feeder = None
+        self._reader = None
+
+    def command(self) -> list:
+        width, height = self.frame_size
+        command = [
+            self.ffmpeg, "-hide_banner", "-loglevel", "error",
+            # Frames arrive at whatever rate inference allows, stamp them as they come
+            "-use_wallclock_as_timestamps", "1",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-i", "pipe:0",
+            "-fps_mode", "passthrough",
+            "-c:v", "libx264", "-preset", "ultrafast", "-tune", "zerolatency",
+            "-profile:v", "baseline", "-pix_fmt", "yuv420p",
+            # Keyframes by timestamp, not frame count: the first frame, then every gop_seconds.
+            # -g is only a ceiling and scene cuts are off, so these are the only keyframes
+            "-force_key_frames", f"expr:if(isnan(prev_forced_t),1,gte(t,prev_forced_t+{self.gop_seconds}))",
+            "-g", "9999", "-sc_threshold", "0",
+            "-b:v", self.bitrate, "-maxrate", self.bitrate, "-bufsize", self.bitrate,
+            "-map", "0:v",
+        ]
+        fmp4 = "[f=mp4:movflags=frag_keyframe+empty_moov+default_base_moof]pipe:1"
+        if not self.hls_dir:
+            return command + ["-f", "tee", fmp4]
+        # Relative names only, ffmpeg runs in hls_dir and tee would split a drive letter's colon
+        hls = (f"[f=hls:hls_time={self.hls_segment_seconds}:hls_list_size={self.hls_list_size}"
+               f":hls_flags=delete_segments+independent_segments:hls_segment_type=fmp4"
+               f":hls_fmp4_init_filename=init.mp4:hls_segment_filename=segment_%05d.m4s]index.m3u8")
+        return command + ["-f", "tee", f"{fmp4}|{hls}"]
+
+    def start(self):
+        if shutil.which(self.ffmpeg) is None:
+            raise RuntimeError(f"{self.ffmpeg} was not found, it is needed for the H.264 stream")
+        if self.hls_dir:
+            os.makedirs(self.hls_dir, exist_ok=True)
+        self._running = True
+        self._feeder = threading.Thread(target=self._feed, daemon=True)
+        self._feeder.start()
+
+    def _spawn(self):
+        """Start ffmpeg and the fragment reader once the frame size is known"""
+        self._process = subprocess.Popen(
+            self.command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            cwd=self.hls_dir or None, bufsize=0,
+        )
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def stop(self):
+        self._running = False
+        if self._feeder:
+            self._feeder.join(timeout=5)
+        if self._process:
+            # Closing stdin lets ffmpeg flush the last fragment and exit
+            try:
+                self._process.stdin.close()
+            except OSError:
+                pass
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        if self._reader:
+            self._reader.join(timeout=5)
+        with self._viewers_lock:
+            for viewer in self._viewers:
+                viewer.put(None)
+
+    def write(self, frame: np.ndarray):
+        """Queue a frame for encoding, dropped rather than stalling the pipeline when ffmpeg lags"""
+        if self.frame_size is None:
+            self.frame_size = frame.shape[1::-1]
+        elif frame.shape[1::-1] != self.frame_size:
+            frame = cv2.resize(frame, self.frame_size, interpolation=cv2.INTER_AREA)
+        try:
+            self.frames.put_nowait((time.monotonic(), frame.tobytes()))
+        except Full:
+            self.frames_dropped += 1
+
+    def _feed(self):
+        while self._running:
+            try:
+                written_at, data = self.frames.get(timeout=0.5)
+            except Empty:
+                continue
+            if self._process is None:
+                try:
+                    self._spawn()
+                except OSError as e:
+                    logger.error(f"Could not start the H.264 encoder: {str(e)}")
+                    break
+            self._written_at.append(written_at)
+            try:
+                self._process.stdin.write(data)
+            except (BrokenPipeError, OSError) as e:
+                logger.error(f"H.264 encoder stopped: {str(e)}")
+                break
+            self.frames_encoded += 1
+
+    def _read_exact(self, size: int) -> Optional[bytes]:
+        chunks = []
+        while size > 0:
+            chunk = self._process.stdout.read(size)
+            if not chunk:
+                return None
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def _read_box(self) -> Optional[Tuple[bytes, bytes]]:
+        header = self._read_exact(8)
+        if header is None:
+            return None
+        size, box_type = struct.unpack(">I4s", header)
+        if size == 1:
+            extended = self._read_exact(8)
+            if extended is None:
+                return None
+            header += extended
+            size = struct.unpack(">Q", extended)[0]
+        body = self._read_exact(size - len(header)) if size > len(header) else b""
+        if body is None:
+            return None
+        return box_type, header + body
+
+    def _read(self):
+        init = []
+        pending = []
+        frames = 0
+        while True:
+            box = self._read_box()
+            if box is None:
+                break
+            box_type, data = box
+            if box_type in INIT_BOXES:
+                init.append(data)
+                if box_type == b"moov":
+                    self.init_segment = b"".join(init)
+                continue
+            pending.append(data)
+            if box_type == b"moof":
+                frames = sample_count(data)
+            elif box_type == b"mdat":
+                self._publish(b"".join(pending), frames)
+                pending = []
+                frames = 0
+
+    def _publish(self, fragment: bytes, frames: int):
+        self.fragments += 1
+        # A fragment holds one GOP and is only sent once complete, so its first
+        # frame waited longest: that is the delay a viewer sees
+        first_written = self._written_at[0] if self._written_at else None
+        for _ in range(min(frames, len(self._written_at))):
+            self._written_at.popleft()
+        self.meter.add(len(fragment), time.monotonic() - first_written if first_written else None)
+        with self._viewers_lock:
+            lagging = []
+            for viewer in self._viewers:
+                try:
+                    viewer.put_nowait(fragment)
+                except Full:
+                    lagging.append(viewer)
+            for viewer in lagging:
+                # Skipping a fragment leaves a gap in the decode timeline, end the
+                # stream instead so the player reconnects from the next keyframe
+                self._viewers.discard(viewer)
+                while True:
+                    try:
+                        viewer.get_nowait()
+                    except Empty:
+                        break
+                viewer.put_nowait(None)
+                self.viewers_dropped += 1
+
+    @property
+    def viewers(self) -> int:
+        return len(self._viewers)
+
+    def subscribe(self, timeout: float = 10.0):
+        """Generator of the fMP4 byte stream for one viewer: init segment, then live fragments"""
+        deadline = time.monotonic() + timeout
+        while self.init_segment is None:
+            if not self._running or time.monotonic() > deadline:
+                return
+            time.sleep(0.05)
+
+        viewer = Queue(maxsize=4)
+        with self._viewers_lock:
+            self._viewers.add(viewer)
+        try:
+            yield self.init_segment
+            while self._running:
+                try:
+                    fragment = viewer.get(timeout=1.0)
+                except Empty:
+                    continue
+                if fragment is None:
+                    break
+                yield fragment
+        finally:
+            with self._viewers_lock:
+                self._viewers.discard(viewer)
+
+    def hls_path(self, name: str) -> Optional[str]:
+        """Path of a playlist or segment file in hls_dir, None for anything else"""
+        if not self.hls_dir or os.path.basename(name) != name or not name.endswith((".m3u8", ".m4s", ".mp4")):
+            return None
+        path = os.path.join(self.hls_dir, name)
+        return path if os.path.exists(path) else None
+
+    def snapshot(self) -> dict:
+        return {
+            **self.meter.snapshot(),
+            "viewers": self.viewers,
+            "frames_encoded": self.frames_encoded,
+            "frames_dropped": self.frames_dropped,
+            "fragments": self.fragments,
+            "frame_size": list(self.frame_size) if self.frame_size else None,
+            "gop_seconds": self.gop_seconds,
+            "viewers_dropped": self.viewers_dropped,
+            "hls": bool(self.hls_dir),
+        }
@@ -0,0 +1,257 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from itertools import combinations
+from queue import Empty, Full, Queue
+from typing import Dict, Optional
+import cv2
+import numpy as np
+from detections import X1, Y2, CONF, CLS
+
+logger = logging.getLogger(__name__)
+
+def dhash(frame: np.ndarray) -> int:
+    """64-bit difference hash: brightness gradients of a 9x8 grayscale thumbnail"""
+    gray = cv2.cvtColor(cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+    bits = (gray[:, 1:] > gray[:, :-1]).reshape(-1)
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class HashIndex:
+    """In-memory near-duplicate index of 64-bit perceptual hashes (multi-index hashing).
+
+    Each hash is split into ``bands`` bands of 64 / ``bands`` bits that key
+    a dict of buckets. Two hashes within ``max_distance`` bits differ by at
+    most ``max_distance // bands`` bits in at least one band, so a lookup
+    probes every band value within that radius. With the defaults (4 bands
+    of 16 bits, radius 1) that is 68 probes into buckets of 65536 keys.
+    A bucket holds at most ``max_bucket`` hashes and forgets its oldest one
+    beyond that, so a lookup compares against at most probes * max_bucket
+    hashes however many frames are stored. Skewed scenes then at worst miss
+    a duplicate and store it again. Buckets are insertion-ordered dicts, so
+    removal is O(1) per band.
+    """
+
+    def __init__(self, max_distance: int = 6, bands: int = 4, max_bucket: int = 64):
+        if 64 % bands:
+            raise ValueError("bands must divide 64")
+        self.max_distance = max_distance
+        self.bands = bands
+        self.band_bits = 64 // bands
+        self.max_bucket = max_bucket
+        radius = max_distance // bands
+        if radius > 2:
+            raise ValueError("Use more bands: more than 2 bits per band makes lookups probe too many buckets")
+        # Every band value within radius bits is XOR'd with one of these masks
+        self._flips = [sum(1 << bit for bit in bits)
+                       for r in range(radius + 1) for bits in combinations(range(self.band_bits), r)]
+        self.buckets: Dict[tuple, Dict[int, None]] = {}
+        self._counts: Dict[int, int] = {}  # hash -> times added, a hash may be stored twice
+        # The detection loop looks up and adds while the writer thread evicts
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self._counts)
+
+    def _keys(self, value: int):
+        mask = (1 << self.band_bits) - 1
+        return [(band, (value >> (band * self.band_bits)) & mask) for band in range(self.bands)]
+
+    def find(self, value: int) -> Optional[int]:
+        """A stored hash within max_distance of ``value``, or None"""
+        with self._lock:
+            for band, key in self._keys(value):
+                for flip in self._flips:
+                    for stored in self.buckets.get((band, key ^ flip), ()):
+                        if hamming(value, stored) <= self.max_distance:
+                            return stored
+        return None
+
+    def add(self, value: int):
+        with self._lock:
+            self._counts[value] = self._counts.get(value, 0) + 1
+            for key in self._keys(value):
+                bucket = self.buckets.setdefault(key, {})
+                bucket[value] = None
+                if len(bucket) > self.max_bucket:
+                    del bucket[next(iter(bucket))]
+
+    def remove(self, value: int):
+        with self._lock:
+            count = self._counts.get(value)
+            if count is None:
+                return
+            if count > 1:
+                self._counts[value] = count - 1
+                return
+            del self._counts[value]
+            for key in self._keys(value):
+                bucket = self.buckets.get(key)
+                if bucket is not None:
+                    bucket.pop(value, None)
+                    if not bucket:
+                        del self.buckets[key]
+
+class HardExampleCapture:
+    """Keeps frames the model is unsure about as a YOLO-format dataset for retraining.
+
+    A frame is a candidate when one of its detections scores inside
+    [``low``, ``high``). Candidates at most one per ``min_interval`` seconds
+    are hashed and dropped when a near-duplicate is already stored, so a
+    static scene is kept once. The rest are written by a background thread
+    as ``images/*.jpg`` plus ``labels/*.txt`` pseudo-labels (every detection
+    from ``low`` up) under ``directory/camera_<id>``. The oldest examples are
+    deleted once the camera's examples exceed ``max_bytes``.
+    """
+
+    def __init__(self, directory: str, camera_id: str, low: float = 0.25, high: float = 0.5,
+                 max_bytes: int = 2 * 1024 ** 3, min_interval: float = 1.0, max_distance: int = 6,
+                 jpeg_quality: int = 90, max_pending: int = 16):
+        self.directory = os.path.join(directory, f"camera_{camera_id}")
+        self.images_dir = os.path.join(self.directory, "images")
+        self.labels_dir = os.path.join(self.directory, "labels")
+        self.camera_id = camera_id
+        self.low = low
+        self.high = high
+        self.max_bytes = max_bytes
+        self.min_interval = min_interval
+        self.jpeg_quality = jpeg_quality
+        self.index = HashIndex(max_distance)
+        self.queue = Queue(maxsize=max_pending)
+        self.examples = deque()  # (name, size, hash), oldest first
+        self.total_bytes = 0
+        self.class_names = None
+        self.stats = {"frames": 0, "uncertain": 0, "duplicates": 0, "captured": 0, "dropped": 0, "evicted": 0}
+        self._last_capture = 0.0
+        self._running = False
+        self._thread = None
+        os.makedirs(self.images_dir, exist_ok=True)
+        os.makedirs(self.labels_dir, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        """Rebuild the index and quota accounting from examples kept by earlier runs"""
+        names = sorted(name[:-len(".jpg")] for name in os.listdir(self.images_dir) if name.endswith(".jpg"))
+        for name in names:
+            try:
+                value = int(name.rsplit("_", 1)[1], 16)
+            except (IndexError, ValueError):
+                continue
+            size = sum(os.path.getsize(path) for path in self._paths(name) if os.path.exists(path))
+            self.examples.append((name, size, value))
+            self.total_bytes += size
+            self.index.add(value)
+
+    def _paths(self, name: str):
+        return os.path.join(self.images_dir, f"{name}.jpg"), os.path.join(self.labels_dir, f"{name}.txt")
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+
+    def offer(self, frame: np.ndarray, detections: np.ndarray, class_names: Dict[int, str]) -> bool:
+        """Queue ``frame`` when it is uncertain, due and new; True when it was queued"""
+        self.stats["frames"] += 1
+        scores = detections[:, CONF]
+        if not np.any((scores >= self.low) & (scores < self.high)):
+            return False
+        self.stats["uncertain"] += 1
+        now = time.monotonic()
+        if now - self._last_capture < self.min_interval:
+            return False
+
+        value = dhash(frame)
+        if self.index.find(value) is not None:
+            self.stats["duplicates"] += 1
+            return False
+
+        try:
+            self.queue.put_nowait((frame.copy(), detections[scores >= self.low].copy(), value, class_names))
+        except Full:
+            self.stats["dropped"] += 1
+            return False
+        # Indexed right away so the frames queued behind it are deduplicated against it
+        self.index.add(value)
+        self._last_capture = now
+        return True
+
+    def _run(self):
+        while self._running or not self.queue.empty():
+            try:
+                frame, detections, value, class_names = self.queue.get(timeout=0.5)
+            except Empty:
+                continue
+            try:
+                self._write(frame, detections, value, class_names)
+            except OSError as e:
+                self.index.remove(value)
+                logger.error(f"Could not write hard example: {str(e)}")
+
+    def _write(self, frame: np.ndarray, detections: np.ndarray, value: int, class_names: Dict[int, str]):
+        if class_names != self.class_names:
+            # classes.txt maps label ids to names for the annotation tool
+            with open(os.path.join(self.directory, "classes.txt"), "w") as handle:
+                handle.write("".join(f"{class_names.get(i, i)}\n" for i in range(max(class_names) + 1)))
+            self.class_names = class_names
+
+        now = time.time()
+        # Names sort by capture time and carry the hash to rebuild the index on restart
+        name = f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(now))}_{int(now * 1000) % 1000:03d}_{value:016x}"
+        image_path, label_path = self._paths(name)
+        ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            raise OSError("JPEG encoding failed")
+        with open(image_path, "wb") as handle:
+            handle.write(buffer.tobytes())
+
+        # YOLO format: class x_center y_center width height, normalized to the image
+        height, width = frame.shape[:2]
+        scale = np.array([width, height, width, height], dtype=np.float32)
+        boxes = detections[:, X1:Y2 + 1] / scale
+        lines = [
+            f"{int(cls)} {(x1 + x2) / 2:.6f} {(y1 + y2) / 2:.6f} {x2 - x1:.6f} {y2 - y1:.6f}\n"
+            for (x1, y1, x2, y2), cls in zip(boxes.clip(0.0, 1.0), detections[:, CLS])
+        ]
+        with open(label_path, "w") as handle:
+            handle.write("".join(lines))
+
+        size = os.path.getsize(image_path) + os.path.getsize(label_path)
+        self.examples.append((name, size, value))
+        self.total_bytes += size
+        self.stats["captured"] += 1
+        self._enforce_quota()
+
+    def _enforce_quota(self):
+        # The example just written is never deleted
+        while self.total_bytes > self.max_bytes and len(self.examples) > 1:
+            name, size, value = self.examples.popleft()
+            for path in self._paths(name):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self.index.remove(value)
+            self.total_bytes -= size
+            self.stats["evicted"] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "directory": self.directory,
+            "band": [self.low, self.high],
+            "stored": len(self.examples),
+            "stored_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "indexed_hashes": self.index.size,
+        }
@@ -0,0 +1,194 @@
+import logging
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from multiprocessing import shared_memory
+from queue import Empty
+from typing import Dict, List, Optional, Sequence, Tuple
+import cv2
+import numpy as np
+from detections import boxes_to_array, empty_detections
+from frame_buffers import fit_to_stride
+
+logger = logging.getLogger(__name__)
+
+class SharedFrameRing:
+    """Fixed-size uint8 frame slots in one shared memory block, viewed as a numpy array"""
+
+    def __init__(self, slots: int, frame_shape: Tuple[int, int, int], name: Optional[str] = None):
+        self.slots = slots
+        self.frame_shape = tuple(frame_shape)
+        size = slots * int(np.prod(self.frame_shape))
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.frames = np.ndarray((slots,) + self.frame_shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        # Drop the numpy view first, SharedMemory refuses to close with exported buffers
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def _worker_main(worker_index: int, model_name: str, ring_name: str, slots: int,
+                 frame_shape: Tuple[int, int, int], cores: Sequence[int], threads: int,
+                 inference_args: dict, requests, results):
+    import torch
+    from ultralytics import YOLO
+
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    model = YOLO(model_name)
+    model.fuse()
+    ring = SharedFrameRing(slots, frame_shape, name=ring_name)
+    results.put(("ready", worker_index, model.names))
+
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        seq, slot, (height, width), overrides = item
+        try:
+            # Zero-copy: the model reads the frame straight out of shared memory
+            result = model(ring.frames[slot, :height, :width], verbose=False, device="cpu", **{**inference_args, **overrides})[0]
+            detections = boxes_to_array(result.boxes)
+        except Exception as e:
+            logger.error(f"Inference worker {worker_index} failed on frame {seq}: {str(e)}")
+            detections = empty_detections()
+        results.put((seq, slot, detections))
+
+    ring.close()
+
+class InferencePool:
+    """CPU inference across worker processes, each pinned to its own cores.
+
+    Frames are copied once into a shared memory ring; only (sequence, slot)
+    pairs go to the workers and only detection arrays come back. Each frame
+    is resized like the single-process path does, keeping its aspect ratio
+    with the long side at ``imgsz`` and both sides stride multiples, into the
+    top-left corner of a square slot.
+    """
+
+    def __init__(self, model_name: str, workers: int, imgsz: int = 640,
+                 threads_per_worker: Optional[int] = None, slots_per_worker: int = 2,
+                 inference_args: Optional[dict] = None, start_timeout: float = 120.0, stride: int = 32):
+        self.workers = workers
+        self.imgsz = imgsz
+        self.stride = stride
+        # Square slots fit a fitted frame of any aspect ratio
+        side = max(fit_to_stride(imgsz, imgsz, imgsz, stride))
+        self.ring = SharedFrameRing(workers * slots_per_worker, (side, side, 3))
+        self.slot_sizes: List[Tuple[int, int]] = [(side, side)] * self.ring.slots  # (height, width) in use
+        self.free_slots = deque(range(self.ring.slots))
+        self.names: Dict[int, str] = {}
+        self._next_seq = 0
+
+        context = mp.get_context("spawn")
+        self.requests = context.Queue()
+        self.results = context.Queue()
+        self.processes = []
+        for index, cores in enumerate(self._core_sets(workers)):
+            process = context.Process(
+                target=_worker_main,
+                args=(index, model_name, self.ring.name, self.ring.slots, self.ring.frame_shape,
+                      cores, threads_per_worker or max(1, len(cores)), inference_args or {},
+                      self.requests, self.results),
+                daemon=True,
+            )
+            process.start()
+            self.processes.append(process)
+
+        # A worker that dies while loading (bad weights, missing package) never reports ready
+        deadline = time.monotonic() + start_timeout
+        ready = 0
+        while ready < workers:
+            try:
+                _, _, names = self.results.get(timeout=1.0)
+            except Empty:
+                dead = [process for process in self.processes if not process.is_alive()]
+                if dead or time.monotonic() > deadline:
+                    self._terminate()
+                    if dead:
+                        raise RuntimeError(f"Inference worker exited with code {dead[0].exitcode} during startup")
+                    raise RuntimeError(f"Inference workers did not start within {start_timeout:.0f}s")
+                continue
+            self.names = names
+            ready += 1
+
+    @staticmethod
+    def _core_sets(workers: int) -> List[List[int]]:
+        if hasattr(os, "sched_getaffinity"):
+            cores = sorted(os.sched_getaffinity(0))
+        else:
+            cores = list(range(os.cpu_count() or 1))
+        per_worker = max(1, len(cores) // workers)
+        return [cores[(i * per_worker) % len(cores):][:per_worker] for i in range(workers)]
+
+    def frame_size(self, width: int, height: int) -> Tuple[int, int]:
+        """(width, height) a frame of the given size is resized to before inference"""
+        return fit_to_stride(width, height, self.imgsz, self.stride)
+
+    def has_free_slot(self) -> bool:
+        return bool(self.free_slots)
+
+    @property
+    def in_flight(self) -> int:
+        return self.ring.slots - len(self.free_slots)
+
+    def submit(self, frame: np.ndarray, conf: Optional[float] = None) -> int:
+        """Copy ``frame`` into a free slot and queue it, returns its sequence number.
+
+        ``conf`` overrides the pool's inference confidence for this frame.
+        """
+        height, width = frame.shape[:2]
+        size = self.frame_size(width, height)
+        slot = self.free_slots.popleft()
+        target = self.ring.frames[slot, :size[1], :size[0]]
+        if size == (width, height):
+            np.copyto(target, frame)
+        else:
+            cv2.resize(frame, size, dst=target, interpolation=cv2.INTER_AREA)
+        self.slot_sizes[slot] = (size[1], size[0])
+        seq = self._next_seq
+        self._next_seq += 1
+        self.requests.put((seq, slot, self.slot_sizes[slot], {} if conf is None else {"conf": conf}))
+        return seq
+
+    def collect(self, timeout: Optional[float] = None) -> Tuple[int, int, np.ndarray]:
+        """Wait for the next finished frame (any order), returns (seq, slot, detections)"""
+        return self.results.get(timeout=timeout)
+
+    def frame(self, slot: int) -> np.ndarray:
+        height, width = self.slot_sizes[slot]
+        return self.ring.frames[slot, :height, :width]
+
+    def release(self, slot: int):
+        self.free_slots.append(slot)
+
+    def close(self):
+        for _ in self.processes:
+            self.requests.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.ring.close()
+
+    def _terminate(self):
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+            process.join(timeout=5)
+        self.ring.close()
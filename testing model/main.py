@@ -1,54 +1,132 @@
-from fastapi import FastAPI, Response
-from fastapi.responses import StreamingResponse, HTMLResponse
+from fastapi import Depends, FastAPI, Header, HTTPException, Response
+from fastapi.responses import FileResponse, StreamingResponse, HTMLResponse
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 import cv2
 import numpy as np
 import logging
 import threading
-from queue import Queue
+from queue import Empty, Queue
 import time
 from ultralytics import YOLO
 import os
 import torch
 import asyncio
 import base64
+import hmac
 import winsound  # For Windows sound alerts
 from datetime import datetime
-from collections import defaultdict
-from typing import List
+from collections import defaultdict, deque
+from typing import List, Optional, Tuple
+from alert_publisher import AlertPublisher
+from detections import boxes_to_array
+from cascade import PPECascade
+from inference_pool import InferencePool
+from model_swap import ModelSwapper
+from scheduler import ComputeBudgetScheduler
+from rules import RuleEngine, RuleSource, rules_from_class_names
+from recorder import PassthroughCapture, StreamRecorder
+from hard_examples import HardExampleCapture
+from h264_stream import H264Stream, StreamMeter
+from frame_buffers import EncodeBuffer, FrameBufferPool, FrameReader, ModelInput, fit_to_stride, peak_rss_mb
 
-def create_camera_app(model_name: str, camera_ip: str , alert_classes: List[str]):
+def create_camera_app(model_name: str, camera_ip: str , alert_classes: List[str],
+                      camera_id: str = "0", alert_url: Optional[str] = None,
+                      alert_key: Optional[str] = None, inference_workers: int = 0,
+                      inference_threads: Optional[int] = None,
+                      scheduler: Optional[ComputeBudgetScheduler] = None, priority: float = 1.0,
+                      preallocated_frames: bool = False, imgsz: Optional[int] = None,
+                      record_dir: Optional[str] = None, record_max_bytes: Optional[int] = None,
+                      record_max_age: Optional[float] = None, source=None,
+                      rules_api_url: Optional[str] = None, rules_interval: float = 10.0,
+                      admin_token: Optional[str] = None, weights_dir: Optional[str] = None,
+                      person_model: Optional[str] = None,
+                      h264: bool = False, h264_raw: bool = False, h264_bitrate: str = "1M",
+                      hls_dir: Optional[str] = None, capture_dir: Optional[str] = None,
+                      capture_band: Tuple[float, float] = (0.25, 0.5),
+                      capture_max_bytes: int = 2 * 1024 ** 3):
     # Configure logging
     logging.basicConfig(level=logging.ERROR)
     logger = logging.getLogger(__name__)
 
+    if inference_workers > 0 and person_model:
+        # Worker processes run the PPE model on whole frames, they have no person stage
+        raise ValueError("person_model cannot be combined with inference_workers")
+
     # Global variables
     frame_queue = Queue(maxsize=1)  # Single queue for one camera
     camera_thread = None
     is_running = False
     model = None
+    models = None  # Live model plus hot-swap candidate, see /model/*
+    cascade = None  # Person detector gating the PPE model, see person_model
     device = None
+    inference_pool = None  # Multi-process CPU inference, see inference_workers
+    previous_thumbnail = None  # Last inferred frame, downscaled, for motion estimates
+    last_inference = None  # (detections, class_names, evaluation) drawn on frames the scheduler skips
     last_alert_time = defaultdict(float)  # Single alert time tracker
     ALERT_COOLDOWN = 5  # seconds between alerts
 
-    # Alert classes and counters
-    ALERT_CLASSES = alert_classes
+    # Alert rules and counters; alert_classes are plain class names until the
+    # camera's stored AlertClass settings are fetched from rules_api_url
+    rule_engine = RuleEngine(rules_from_class_names(alert_classes))
+    rule_source = RuleSource(rule_engine, rules_api_url, camera_id, alert_key, interval=rules_interval) \
+        if rules_api_url else None
     alert_counter = defaultdict(int)  # Single counter for alerts
 
     # Frame settings
     FRAME_WIDTH = 640  # Increased resolution for better detection
     FRAME_HEIGHT = 480
     FRAME_SKIP = 0  # Process every frame for better detection
+    # Long side of frames resized for the model, see frame_size_for
+    MODEL_IMGSZ = imgsz or max(FRAME_WIDTH, FRAME_HEIGHT)
+    frame_shape = None  # (height, width, 3) of processed frames, known after the first one
+
+    # Reusable frame buffers and model input instead of fresh allocations per frame,
+    # created once the first frame gives the source's aspect ratio
+    frame_pool = None
+    frame_reader = None
+    model_input = None
+    memory_stats = {"frames": 0, "frame_allocations": 0, "encode_allocations": 0}
+
+    # H.264 output encoded once for all viewers of /video.mp4 and /hls/, next to MJPEG,
+    # at the size of the first processed frame; h264_raw streams the frames before the
+    # detection overlay is drawn
+    h264_stream = H264Stream(bitrate=h264_bitrate, hls_dir=hls_dir) if h264 else None
+    mjpeg_meter = StreamMeter()
+    stream_stats = {"frame_ready": 0.0, "mjpeg_viewers": 0}
+
+    # Uncertain, deduplicated frames with pseudo-labels for retraining
+    hard_examples = HardExampleCapture(capture_dir, camera_id, low=capture_band[0], high=capture_band[1],
+                                       max_bytes=capture_max_bytes) if capture_dir else None
+
+    def inference_conf():
+        """Confidence floor of the model call: what the rules need, lowered to the capture band"""
+        if hard_examples:
+            return min(rule_engine.inference_conf, hard_examples.low)
+        return rule_engine.inference_conf
 
     # Camera configuration
     CAMERA_URL = f"http://{camera_ip}/video"  # Single camera URL
 
+    # Raw stream recording for deterministic replay; pass a RecordingReplay as
+    # source to feed a recorded time range through the pipeline instead
+    recorder = StreamRecorder(record_dir, max_bytes=record_max_bytes, max_age=record_max_age) \
+        if record_dir else None
+
+    # Push alerts to the backend (POST /api/alerts/) so dashboards get them live
+    alert_publisher = AlertPublisher(alert_url, alert_key) if alert_url else None
+
     @asynccontextmanager
     async def lifespan(app: FastAPI):
-        nonlocal model, camera_thread, is_running, device
+        nonlocal model, models, cascade, camera_thread, is_running, device, inference_pool
         
         try:
+            if rule_source:
+                # Fetch the stored rules once before the first frame, then keep polling
+                rule_source.poll()
+                rule_source.start()
+
             # Check for CUDA availability
             device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
             print(f"Using device: {device}")
@@ -56,15 +134,51 @@ def create_camera_app(model_name: str, camera_ip: str , alert_classes: List[str]
             if not os.path.exists(model_name):
                 raise FileNotFoundError(f"Model file not found at: {model_name}")
             
-            # Load model and move to GPU
-            model = YOLO(model_name)
-            model.to(device)
-            
-            # Optimize for GPU
-            model.fuse()
-            model.conf = 0.3
-            model.iou = 0.3
+            if inference_workers > 0 and device.type == 'cpu':
+                # Spread CPU inference over worker processes pinned to their own cores
+                inference_pool = InferencePool(
+                    model_name, inference_workers, MODEL_IMGSZ,
+                    threads_per_worker=inference_threads,
+                    inference_args={"iou": 0.4}
+                )
+            else:
+                # Load model and move to GPU
+                model = YOLO(model_name)
+                model.to(device)
+
+                # Optimize for GPU
+                model.fuse()
+                model.conf = 0.3
+                model.iou = 0.3
+                # Warm-up shape until the first frame tells the real one
+                models = ModelSwapper(device, (FRAME_HEIGHT, FRAME_WIDTH, 3))
+                models.set_live(model_name, model)
+
+                if person_model:
+                    # Two-stage mode: a small person detector runs on every frame and
+                    # the PPE model only on the crops of people whose verdict is due
+                    person_detector = YOLO(person_model)
+                    person_detector.to(device)
+                    person_detector.fuse()
+                    cascade = PPECascade(person_detector, device)
             
+            if alert_publisher:
+                alert_publisher.start()
+
+            if recorder:
+                recorder.start()
+
+            if h264_stream:
+                h264_stream.start()
+
+            if hard_examples:
+                hard_examples.start()
+
+            if scheduler:
+                # Share the box's inference budget with the other cameras on it
+                scheduler.register(camera_id, priority=priority)
+                scheduler.start()
+
             # Start camera thread
             is_running = True
             camera_thread = threading.Thread(target=process_stream, daemon=True)
@@ -78,6 +192,22 @@ def create_camera_app(model_name: str, camera_ip: str , alert_classes: List[str]
             is_running = False
             if camera_thread:
                 camera_thread.join()
+            if inference_pool:
+                inference_pool.close()
+            if scheduler:
+                scheduler.unregister(camera_id)
+                if not scheduler.cameras:
+                    scheduler.stop()
+            if alert_publisher:
+                alert_publisher.stop()
+            if recorder:
+                recorder.stop()
+            if rule_source:
+                rule_source.stop()
+            if h264_stream:
+                h264_stream.stop()
+            if hard_examples:
+                hard_examples.stop()
 
     app = FastAPI(title="Camera Streaming API", lifespan=lifespan)
 
@@ -96,9 +226,209 @@ def create_camera_app(model_name: str, camera_ip: str , alert_classes: List[str]
         os.makedirs("captures", exist_ok=True)
         cv2.imwrite(filename, frame)
         logger.info(f"Saved alert screenshot: {filename}")
+        return filename
+
+    def measure_motion(frame):
+        """Mean absolute difference to the previous inferred frame, from 0 to 1"""
+        nonlocal previous_thumbnail
+        thumbnail = cv2.cvtColor(cv2.resize(frame, (64, 48), interpolation=cv2.INTER_AREA),
+                                 cv2.COLOR_BGR2GRAY)
+        motion = 0.0
+        if previous_thumbnail is not None:
+            motion = float(cv2.absdiff(thumbnail, previous_thumbnail).mean()) / 255.0
+        previous_thumbnail = thumbnail
+        return motion
+
+    def handle_detections(frame, detections, class_names, evaluation=None):
+        """Draw detections, raise alerts and hand the annotated frame to the stream.
+
+        An ``evaluation`` is passed when the last inferred detections are drawn
+        again on a frame the scheduler kept from the model: rules are not
+        evaluated again and nothing is alerted or captured for it.
+        Returns the number of detections counting towards a firing alert rule.
+        """
+        nonlocal last_inference
+        # Initialize counters for current frame
+        current_frame_counts = defaultdict(int)
+        violations = 0
+        alert_triggered = False
+        triggered_class = None
+        triggered_conf = 0.0
+        fresh = evaluation is None
+        if fresh:
+            evaluation = rule_engine.evaluate(detections, class_names, frame.shape)
+            last_inference = (detections, class_names, evaluation)
+        if h264_stream and h264_raw:
+            h264_stream.write(frame)
+        if fresh and hard_examples:
+            # Before anything is drawn on the frame
+            hard_examples.offer(frame, detections, class_names)
+        
+        # Process detections
+        for i, (x1, y1, x2, y2, conf, cls) in enumerate(detections):
+            # Below the class's display confidence, unless it fires a rule
+            # whose alert threshold is lower than that
+            if not (evaluation.visible[i] or evaluation.alerting[i]):
+                continue
+            x1, y1, x2, y2 = map(int, [x1, y1, x2, y2])
+            class_name = class_names[int(cls)]
+            
+            # Increment counter for this class
+            current_frame_counts[class_name] += 1
+            
+            # Check if this detection fires an alert rule
+            if evaluation.alerting[i]:
+                alert_triggered = True
+                triggered_class = class_name
+                triggered_conf = float(conf)
+                violations += 1
+                # Draw red rectangle for alert
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 3)
+                cv2.putText(frame, f"ALERT: {class_name} {conf:.1f}", (x1, y1 - 5),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            else:
+                # Draw normal green rectangle for other detections
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+                cv2.putText(frame, f"{class_name} {conf:.1f}", (x1, y1 - 5),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        
+        # Trigger alert if needed
+        if fresh and alert_triggered and triggered_class:
+            current_time = time.time()
+            if (current_time - last_alert_time[triggered_class]) > ALERT_COOLDOWN:
+                last_alert_time[triggered_class] = current_time
+                alert_counter[triggered_class] += 1
+                
+                # Play alert sound
+                winsound.Beep(1000, 1000)
+                
+                # Save screenshot
+                screenshot = save_alert_screenshot(frame, triggered_class, camera_id)
+
+                if alert_publisher:
+                    alert_publisher.publish({
+                        "camera_id": camera_id,
+                        "alert_class": triggered_class,
+                        "confidence": triggered_conf,
+                        "count": alert_counter[triggered_class],
+                        "timestamp": datetime.utcnow().isoformat(),
+                        "screenshot": screenshot,
+                    })
+                
+                # Log the alert
+                logger.warning(f"ALERT: {triggered_class} detected at {datetime.now()}")
+                
+                # Add visual alert overlay
+                counter_text = f"ALERT: {triggered_class.upper()} DETECTED!"
+                cv2.putText(frame, counter_text, (10, 30),
+                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+        
+        # Display current frame detection counts
+        y_offset = 70
+        for alert_class in rule_engine.rule_names:
+            count = current_frame_counts[alert_class]
+            if count > 0:
+                counter_text = f"Current {alert_class}: {count}"
+                cv2.putText(frame, counter_text, (10, y_offset),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                y_offset += 30
+        
+        # Display total counts
+        y_offset += 20
+        cv2.putText(frame, "Total Counts:", (10, y_offset),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        y_offset += 30
+        
+        for alert_class in rule_engine.rule_names:
+            total_count = alert_counter[alert_class]
+            counter_text = f"Total {alert_class}: {total_count}"
+            cv2.putText(frame, counter_text, (10, y_offset),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+            y_offset += 30
+        
+        if h264_stream and not h264_raw:
+            h264_stream.write(frame)
+        publish_frame(frame)
+        return violations
+
+    def stream_skipped_frame(frame):
+        """Stream a frame the scheduler kept from the model, with the last detections drawn on it"""
+        if last_inference is not None:
+            handle_detections(frame, *last_inference)
+            return
+        if h264_stream:
+            h264_stream.write(frame)
+        publish_frame(frame)
+
+    def publish_frame(frame):
+        """Hand a finished frame to the MJPEG stream, which releases it back to the pool"""
+        stream_stats["frame_ready"] = time.monotonic()
+        while not frame_queue.empty():
+            try:
+                dropped = frame_queue.get_nowait()
+                if frame_pool:
+                    frame_pool.release(dropped)
+            except:
+                pass
+            
+        try:
+            frame_queue.put_nowait(frame)
+        except:
+            if frame_pool:
+                frame_pool.release(frame)
+
+    def frame_size_for(width, height):
+        """(width, height) frames are resized to right after decoding.
+
+        Preallocated input and the worker pool skip the model's letterbox, and
+        imgsz asks for the model's size anyway: those get the source's aspect
+        ratio with the long side at MODEL_IMGSZ, both sides stride multiples.
+        Otherwise frames keep the source size and the model letterboxes them.
+        """
+        if imgsz or preallocated_frames or inference_pool:
+            return fit_to_stride(width, height, MODEL_IMGSZ)
+        return width, height
+
+    def decoded_frames(cap):
+        """Frames of ``cap`` at frame_size_for the source, in pooled buffers with preallocated_frames"""
+        nonlocal frame_shape, frame_pool, frame_reader, model_input
+        ret, frame = cap.read()
+        if not ret:
+            return
+        memory_stats["frame_allocations"] += 1
+        size = frame_size_for(frame.shape[1], frame.shape[0])
+        frame_shape = (size[1], size[0], 3)
+        if models:
+            models.warmup_shape = frame_shape
+        if preallocated_frames:
+            frame_pool = FrameBufferPool(frame_shape)
+            frame_reader = FrameReader(cap, frame_pool)
+            if models:
+                model_input = ModelInput(frame_shape, device, half=device.type == 'cuda')
+            frame = frame_reader.adopt(frame)
+
+        while True:
+            if frame.shape != frame_shape:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                memory_stats["frame_allocations"] += 1
+            yield frame
+            if frame_reader:
+                frame = frame_reader.read()
+                if frame is None:
+                    return
+            else:
+                ret, frame = cap.read()
+                if not ret:
+                    return
+                memory_stats["frame_allocations"] += 1
 
     def process_stream():
-        cap = cv2.VideoCapture(CAMERA_URL, cv2.CAP_FFMPEG)
+        if source is not None:
+            cap = source
+        elif recorder:
+            cap = PassthroughCapture(CAMERA_URL, recorder)
+        else:
+            cap = cv2.VideoCapture(CAMERA_URL, cv2.CAP_FFMPEG)
         
         if not cap.isOpened():
             logger.error("Failed to open camera stream")
@@ -109,113 +439,137 @@ def create_camera_app(model_name: str, camera_ip: str , alert_classes: List[str]
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
         cap.set(cv2.CAP_PROP_FPS, 30)
-        
-        while is_running and cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
+
+        frames = decoded_frames(cap)
+        if inference_pool:
+            process_stream_pooled(frames)
+        else:
+            for frame in frames:
+                if not is_running:
+                    if frame_pool:
+                        frame_pool.release(frame)
+                    break
+                memory_stats["frames"] += 1
+
+                # Set once the frame is queued for the stream, which then releases it
+                handed_off = False
+                try:
+                    if scheduler and not scheduler.should_infer(camera_id):
+                        # Only the model call is skipped, the stream keeps the camera's frame rate
+                        stream_skipped_frame(frame)
+                        handed_off = True
+                        continue
+
+                    motion = measure_motion(frame) if scheduler else 0.0
+
+                    # Directly process frame with model; read the live model once
+                    # per frame so a promote or rollback takes effect between frames
+                    live = models.live
+                    inference_args = {"conf": inference_conf(), "iou": 0.4, "half": True}
+                    started = time.perf_counter()
+                    if cascade:
+                        detections = cascade.detect(frame, live.model, inference_args)
+                    else:
+                        model_source = model_input.fill(frame) if model_input else frame
+                        results = live.model(model_source, verbose=False, device=device, **inference_args)
+                        detections = boxes_to_array(results[0].boxes)
+                    latency_ms = (time.perf_counter() - started) * 1000
+
+                    # Shadowing compares full-frame models, and has to see the frame before drawing
+                    if not cascade:
+                        models.offer_shadow(frame, detections, live.names, latency_ms, inference_args)
+                    violations = handle_detections(frame, detections, live.names)
+                    handed_off = True
+                    if scheduler:
+                        scheduler.record(camera_id, violations, motion)
+
+                except Exception as e:
+                    logger.error(f"Error processing frame: {str(e)}")
+                    continue
+
+                finally:
+                    if frame_pool and not handed_off:
+                        frame_pool.release(frame)
+
+        cap.release()
+
+    def process_stream_pooled(frames):
+        """Keep every pool worker busy and emit annotated frames in capture order.
+
+        Frames the scheduler keeps from the model wait in line as well, and are
+        streamed with the last detections once the frames before them are out.
+        """
+        finished = {}
+        pending = deque()  # capture order: (seq, None, motion) inferred, (None, frame, 0.0) skipped
+        # Skipped frames waiting behind an inference hold pool buffers, so reading stops
+        # once as many frames wait as the pool has slots for
+        max_pending = 2 * inference_pool.ring.slots
+        while is_running:
+            if inference_pool.has_free_slot() and len(pending) < max_pending:
+                frame = next(frames, None)
+                if frame is None:
+                    break
+                memory_stats["frames"] += 1
+                if scheduler and not scheduler.should_infer(camera_id):
+                    pending.append((None, frame, 0.0))
+                else:
+                    motion = measure_motion(frame) if scheduler else 0.0
+                    # Rules can be reloaded while running, so their confidence goes with every frame
+                    pending.append((inference_pool.submit(frame, inference_conf()), None, motion))
+                    if frame_pool:
+                        # submit() copied it into shared memory
+                        frame_pool.release(frame)
+                timeout = 0.0
+            else:
+                timeout = 1.0
+
+            # Take whatever is finished, only waiting when every slot is busy
             try:
-                # Directly process frame with model
-                results = model(frame, verbose=False, device=device, 
-                              conf=0.4, iou=0.4, half=True)
-                
-                result = results[0]
-                class_names = result.names
-                
-                # Initialize counters for current frame
-                current_frame_counts = defaultdict(int)
-                alert_triggered = False
-                triggered_class = None
-                
-                # Process detections
-                for box in result.boxes:
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    x1, y1, x2, y2 = map(int, [x1, y1, x2, y2])
-                    cls = int(box.cls[0].cpu().numpy())
-                    conf = box.conf[0].cpu().numpy()
-                    class_name = class_names[cls]
-                    
-                    # Increment counter for this class
-                    current_frame_counts[class_name] += 1
-                    
-                    # Check if this is an alert class
-                    if class_name in ALERT_CLASSES and conf > 0.5:
-                        alert_triggered = True
-                        triggered_class = class_name
-                        # Draw red rectangle for alert
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 3)
-                        cv2.putText(frame, f"ALERT: {class_name} {conf:.1f}", (x1, y1 - 5),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                while True:
+                    seq, slot, detections = inference_pool.collect(timeout=timeout)
+                    finished[seq] = (slot, detections)
+                    timeout = 0.0
+            except Empty:
+                pass
+
+            while pending and (pending[0][0] is None or pending[0][0] in finished):
+                seq, frame, motion = pending.popleft()
+                if seq is not None:
+                    slot, detections = finished.pop(seq)
+                    # Copy out so the slot can take a new frame while this one is streamed
+                    if frame_pool:
+                        frame = frame_pool.acquire()
+                        np.copyto(frame, inference_pool.frame(slot))
                     else:
-                        # Draw normal green rectangle for other detections
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                        cv2.putText(frame, f"{class_name} {conf:.1f}", (x1, y1 - 5),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                
-                # Trigger alert if needed
-                if alert_triggered and triggered_class:
-                    current_time = time.time()
-                    if (current_time - last_alert_time[triggered_class]) > ALERT_COOLDOWN:
-                        last_alert_time[triggered_class] = current_time
-                        alert_counter[triggered_class] += 1
-                        
-                        # Play alert sound
-                        winsound.Beep(1000, 1000)
-                        
-                        # Save screenshot
-                        save_alert_screenshot(frame, triggered_class, 0)
-                        
-                        # Log the alert
-                        logger.warning(f"ALERT: {triggered_class} detected at {datetime.now()}")
-                        
-                        # Add visual alert overlay
-                        counter_text = f"ALERT: {triggered_class.upper()} DETECTED!"
-                        cv2.putText(frame, counter_text, (10, 30),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                
-                # Display current frame detection counts
-                y_offset = 70
-                for alert_class in ALERT_CLASSES:
-                    count = current_frame_counts[alert_class]
-                    if count > 0:
-                        counter_text = f"Current {alert_class}: {count}"
-                        cv2.putText(frame, counter_text, (10, y_offset),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                        y_offset += 30
-                
-                # Display total counts
-                y_offset += 20
-                cv2.putText(frame, "Total Counts:", (10, y_offset),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-                y_offset += 30
-                
-                for alert_class in ALERT_CLASSES:
-                    total_count = alert_counter[alert_class]
-                    counter_text = f"Total {alert_class}: {total_count}"
-                    cv2.putText(frame, counter_text, (10, y_offset),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-                    y_offset += 30
-                
-                # Put processed frame in queue
-                while not frame_queue.empty():
-                    try:
-                        frame_queue.get_nowait()
-                    except:
-                        pass
-                    
+                        frame = inference_pool.frame(slot).copy()
+                    inference_pool.release(slot)
+                handed_off = False
                 try:
-                    frame_queue.put_nowait(frame)
-                except:
-                    pass
-                
-            except Exception as e:
-                logger.error(f"Error processing frame: {str(e)}")
-                continue
-            
-        cap.release()
+                    if seq is None:
+                        stream_skipped_frame(frame)
+                        handed_off = True
+                        continue
+                    violations = handle_detections(frame, detections, inference_pool.names)
+                    handed_off = True
+                    if scheduler:
+                        scheduler.record(camera_id, violations, motion)
+                except Exception as e:
+                    logger.error(f"Error processing frame: {str(e)}")
+                finally:
+                    if frame_pool and not handed_off:
+                        frame_pool.release(frame)
+
+        if frame_pool:
+            for seq, frame, _ in pending:
+                if seq is None:
+                    frame_pool.release(frame)
 
     def generate_frames():
+        # Chunks are assembled in one reused buffer instead of concatenating bytes
+        # objects; the ASGI server only sends bytes, so each frame still costs the
+        # single copy out of it
+        encode_buffer = EncodeBuffer(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n', b'\r\n') \
+            if preallocated_frames else None
         while is_running:
             try:
                 frame = frame_queue.get(timeout=0.1)
@@ -225,20 +579,196 @@ def create_camera_app(model_name: str, camera_ip: str , alert_classes: List[str]
                         cv2.IMWRITE_JPEG_QUALITY, 80,
                         cv2.IMWRITE_JPEG_OPTIMIZE, 1
                     ])
-                    
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+
+                    if encode_buffer:
+                        frame_pool.release(frame)
+                        allocations = encode_buffer.allocations
+                        chunk = bytes(encode_buffer.wrap(buffer))
+                        memory_stats["encode_allocations"] += 1 + encode_buffer.allocations - allocations
+                        mjpeg_meter.add(len(chunk), time.monotonic() - stream_stats["frame_ready"])
+                        yield chunk
+                        continue
+
+                    memory_stats["encode_allocations"] += 1
+                    chunk = (b'--frame\r\n'
+                             b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+                    mjpeg_meter.add(len(chunk), time.monotonic() - stream_stats["frame_ready"])
+                    yield chunk
             
-            except:
+            except Exception:
                 continue
 
+    def generate_counted_frames():
+        stream_stats["mjpeg_viewers"] += 1
+        try:
+            yield from generate_frames()
+        finally:
+            stream_stats["mjpeg_viewers"] -= 1
+
     @app.get("/video_feed")
     async def video_feed():
         return StreamingResponse(
-            generate_frames(),
+            generate_counted_frames(),
             media_type='multipart/x-mixed-replace; boundary=frame'
         )
 
+    @app.get("/video.mp4")
+    async def video_mp4():
+        """Live fragmented MP4 (H.264) of the same stream, playable in a <video> element or via MSE"""
+        if not h264_stream:
+            raise HTTPException(status_code=404, detail="H.264 output is not enabled")
+        return StreamingResponse(
+            h264_stream.subscribe(),
+            media_type='video/mp4',
+            headers={"Cache-Control": "no-store"}
+        )
+
+    @app.get("/hls/{name}")
+    async def hls_file(name: str):
+        """HLS playlist (index.m3u8), init segment and media segments of the H.264 stream"""
+        path = h264_stream.hls_path(name) if h264_stream else None
+        if not path:
+            raise HTTPException(status_code=404, detail="Not found")
+        if name.endswith(".m3u8"):
+            return FileResponse(path, media_type="application/vnd.apple.mpegurl",
+                                headers={"Cache-Control": "no-cache"})
+        return FileResponse(path, media_type="video/mp4")
+
+    @app.get("/stats/stream")
+    async def stream_output_stats():
+        """Bitrate and frame delay of the MJPEG output against the shared H.264 encode.
+
+        MJPEG bytes are summed over all its viewers, the H.264 encode is produced
+        once and each fMP4 viewer receives a copy of it.
+        """
+        viewers = stream_stats["mjpeg_viewers"]
+        mjpeg = {**mjpeg_meter.snapshot(), "viewers": viewers}
+        mjpeg["bitrate_kbps_per_viewer"] = round(mjpeg["bitrate_kbps"] / viewers, 1) if viewers else None
+        return {"mjpeg": mjpeg, "h264": h264_stream.snapshot() if h264_stream else None}
+
+    @app.get("/stats/memory")
+    async def frame_memory_stats():
+        """Frame and encode buffer allocations against frames read.
+
+        process_peak_rss_mb covers the whole process, not just this camera.
+        """
+        stats = dict(memory_stats)
+        if frame_pool:
+            stats["frame_pool_reuses"] = frame_pool.reuses
+        if frame_reader:
+            stats["frame_allocations"] = frame_pool.allocations + frame_reader.decoder_allocations
+        stats["preallocated_frames"] = preallocated_frames
+        stats["frame_shape"] = list(frame_shape) if frame_shape else None
+        stats["process_peak_rss_mb"] = peak_rss_mb()
+        return stats
+
+    @app.get("/stats/cascade")
+    async def cascade_stats():
+        """Person crops sent to the PPE model against crops served from cached track verdicts"""
+        if not cascade:
+            raise HTTPException(status_code=404, detail="Cascade mode is not enabled")
+        return {**cascade.stats, "tracks": len(cascade.tracker.tracks)}
+
+    @app.get("/stats/capture")
+    async def capture_stats():
+        """Hard examples captured, deduplicated, dropped and evicted, and the storage used"""
+        if not hard_examples:
+            raise HTTPException(status_code=404, detail="Hard-example capture is not enabled")
+        return hard_examples.snapshot()
+
+    @app.get("/scheduler")
+    async def scheduler_status():
+        """Inference budget allocated to each camera sharing this box and the rate achieved"""
+        if not scheduler:
+            raise HTTPException(status_code=404, detail="No compute budget scheduler configured")
+        return scheduler.snapshot()
+
+    @app.get("/rules")
+    async def alert_rules():
+        """Alert rules in effect and how often they were reloaded from the backend"""
+        return {
+            "alert_classes": rule_engine.alert_classes,
+            "inference_conf": rule_engine.inference_conf,
+            "source": rule_source.url if rule_source else None,
+            "reloads": rule_source.reloads if rule_source else 0,
+        }
+
+    def require_admin(x_admin_token: Optional[str] = Header(None)):
+        # Fail closed: without a configured token the model routes are disabled
+        if not admin_token:
+            raise HTTPException(status_code=403, detail="Model administration is disabled, no admin token configured")
+        if x_admin_token is None or not hmac.compare_digest(x_admin_token, admin_token):
+            raise HTTPException(status_code=403, detail="Invalid admin token")
+
+    def weights_path(name: str) -> str:
+        """Path of a weights file inside weights_dir, anything outside it is rejected"""
+        if not weights_dir:
+            raise HTTPException(status_code=403, detail="Model loading is disabled, no weights directory configured")
+        root = os.path.realpath(weights_dir)
+        path = os.path.realpath(os.path.join(root, name))
+        try:
+            inside = os.path.commonpath([root, path]) == root
+        except ValueError:  # Another drive on Windows
+            inside = False
+        if not inside or not path.endswith(".pt"):
+            raise HTTPException(status_code=400, detail=f"Invalid weights name: {name}")
+        if not os.path.isfile(path):
+            raise HTTPException(status_code=404, detail=f"Model file not found: {name}")
+        return path
+
+    # The swapper routes are plain functions: stopping a shadow worker joins its
+    # thread under the swapper lock, which must not block the event loop
+
+    def model_swapper() -> ModelSwapper:
+        if models is None:
+            raise HTTPException(status_code=409, detail="Model hot-swap is not available with inference workers")
+        return models
+
+    @app.post("/model/load", status_code=202, dependencies=[Depends(require_admin)])
+    def load_model(name: str, shadow_fraction: float = 0.0):
+        """Load and warm up weights from weights_dir in the background, optionally shadowing a fraction of frames"""
+        swapper = model_swapper()
+        path = weights_path(name)
+        if not 0.0 <= shadow_fraction <= 1.0:
+            raise HTTPException(status_code=400, detail="shadow_fraction must be between 0 and 1")
+        try:
+            swapper.load(path, {"conf": inference_conf(), "iou": 0.4, "half": True}, shadow_fraction)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return swapper.status()
+
+    @app.get("/model/status", dependencies=[Depends(require_admin)])
+    def model_status():
+        """Live, previous and candidate models, plus shadow latency and agreement"""
+        return model_swapper().status()
+
+    @app.post("/model/promote", dependencies=[Depends(require_admin)])
+    def promote_model():
+        """Make the warmed-up candidate the live model, keeping the old one for rollback"""
+        swapper = model_swapper()
+        try:
+            swapper.promote()
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return swapper.status()
+
+    @app.post("/model/rollback", dependencies=[Depends(require_admin)])
+    def rollback_model():
+        """Swap the previous model back in"""
+        swapper = model_swapper()
+        try:
+            swapper.rollback()
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return swapper.status()
+
+    @app.delete("/model/candidate", dependencies=[Depends(require_admin)])
+    def discard_model():
+        """Drop the candidate and stop shadowing"""
+        swapper = model_swapper()
+        swapper.discard()
+        return swapper.status()
+
     @app.get("/", response_class=HTMLResponse)
     async def index():
         return """
@@ -0,0 +1,244 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from queue import Empty, Full, Queue
+from typing import Dict, Optional, Tuple
+import numpy as np
+import torch
+from ultralytics import YOLO
+from detections import CLS, boxes_to_array, match_detections
+
+logger = logging.getLogger(__name__)
+
+def percentile(values, q: float) -> Optional[float]:
+    return round(float(np.percentile(values, q)), 2) if len(values) else None
+
+class LoadedModel:
+    """A YOLO model ready for inference and the weights it came from"""
+
+    def __init__(self, path: str, model, load_seconds: float = 0.0, warmup_ms: Optional[float] = None):
+        self.path = path
+        self.model = model
+        self.loaded_at = time.time()
+        self.load_seconds = load_seconds
+        self.warmup_ms = warmup_ms
+
+    @property
+    def names(self) -> Dict[int, str]:
+        return self.model.names
+
+    def describe(self) -> dict:
+        return {
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 2),
+            "warmup_ms": self.warmup_ms,
+        }
+
+class ShadowStats:
+    """Latency and detection agreement of the candidate against the live model on sampled frames"""
+
+    def __init__(self, window: int = 500):
+        self.frames = 0
+        self.dropped = 0
+        self.live_boxes = 0
+        self.candidate_boxes = 0
+        self.matched = 0
+        self.live_latency_ms = deque(maxlen=window)
+        self.candidate_latency_ms = deque(maxlen=window)
+
+    def add(self, live: np.ndarray, candidate: np.ndarray, live_ms: float, candidate_ms: float,
+            iou_threshold: float):
+        self.frames += 1
+        self.live_boxes += len(live)
+        self.candidate_boxes += len(candidate)
+        self.matched += match_detections(live, candidate, iou_threshold)
+        self.live_latency_ms.append(live_ms)
+        self.candidate_latency_ms.append(candidate_ms)
+
+    def snapshot(self) -> dict:
+        total = self.live_boxes + self.candidate_boxes
+        return {
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "live_boxes": self.live_boxes,
+            "candidate_boxes": self.candidate_boxes,
+            "matched": self.matched,
+            # F1 of the candidate's boxes taking the live model's as ground truth
+            "agreement": round(2 * self.matched / total, 4) if total else None,
+            "recall_vs_live": round(self.matched / self.live_boxes, 4) if self.live_boxes else None,
+            "precision_vs_live": round(self.matched / self.candidate_boxes, 4) if self.candidate_boxes else None,
+            "live_latency_ms": {"p50": percentile(self.live_latency_ms, 50),
+                                "p95": percentile(self.live_latency_ms, 95)},
+            "candidate_latency_ms": {"p50": percentile(self.candidate_latency_ms, 50),
+                                     "p95": percentile(self.candidate_latency_ms, 95)},
+        }
+
+class ModelSwapper:
+    """Holds the live model and swaps in new weights without stopping the stream.
+
+    load() reads and warms up the candidate on a background thread. With a
+    shadow fraction, the inference loop hands that share of its frames to
+    offer_shadow() and a separate thread runs the candidate on them, so the
+    live stream never waits for it. promote() makes the candidate live in one
+    reference assignment; the inference loop picks it up on its next frame
+    and rollback() swaps the previous model back the same way.
+    """
+
+    def __init__(self, device: torch.device, warmup_shape: Tuple[int, int, int],
+                 warmup_runs: int = 3, iou_threshold: float = 0.5, shadow_queue: int = 2):
+        self.device = device
+        self.warmup_shape = tuple(warmup_shape)
+        self.warmup_runs = warmup_runs
+        self.iou_threshold = iou_threshold
+        self.live: Optional[LoadedModel] = None
+        self.previous: Optional[LoadedModel] = None
+        self.candidate: Optional[LoadedModel] = None
+        self.state = "idle"  # of the candidate: idle, loading, ready or failed
+        self.error = None
+        self.shadow_fraction = 0.0
+        self.shadow_stats = ShadowStats()
+        self._shadow_queue = Queue(maxsize=shadow_queue)
+        self._shadow_thread = None
+        self._generation = 0  # bumped on every load and discard, stale loads are dropped
+        self._lock = threading.Lock()
+
+    def set_live(self, path: str, model):
+        self.live = LoadedModel(path, model)
+
+    def prepare(self, path: str, inference_args: dict) -> LoadedModel:
+        started = time.perf_counter()
+        model = YOLO(path)
+        model.to(self.device)
+        model.fuse()
+        load_seconds = time.perf_counter() - started
+
+        # First calls build CUDA kernels and cuDNN plans, keep them off the live path
+        frame = np.zeros(self.warmup_shape, dtype=np.uint8)
+        warmup_ms = None
+        for _ in range(self.warmup_runs):
+            started = time.perf_counter()
+            model(frame, verbose=False, device=self.device, **inference_args)
+            warmup_ms = round((time.perf_counter() - started) * 1000, 2)
+        return LoadedModel(path, model, load_seconds, warmup_ms)
+
+    def load(self, path: str, inference_args: dict, shadow_fraction: float = 0.0):
+        with self._lock:
+            if self.state == "loading":
+                raise RuntimeError("A candidate model is already loading")
+            self._stop_shadow()
+            self.candidate = None
+            self.state = "loading"
+            self.error = None
+            self.shadow_fraction = shadow_fraction
+            self.shadow_stats = ShadowStats()
+            self._generation += 1
+            generation = self._generation
+        threading.Thread(target=self._load, args=(path, inference_args, generation), daemon=True).start()
+
+    def _load(self, path: str, inference_args: dict, generation: int):
+        try:
+            candidate = self.prepare(path, inference_args)
+        except Exception as e:
+            logger.error(f"Could not load candidate model {path}: {str(e)}")
+            with self._lock:
+                if generation == self._generation:
+                    self.state = "failed"
+                    self.error = str(e)
+            return
+
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.candidate = candidate
+            self.state = "ready"
+            if self.shadow_fraction > 0:
+                self._shadow_thread = threading.Thread(target=self._run_shadow, args=(candidate,), daemon=True)
+                self._shadow_thread.start()
+
+    def offer_shadow(self, frame: np.ndarray, detections: np.ndarray, names: Dict[int, str],
+                     latency_ms: float, inference_args: dict):
+        """Queue a copy of a live-inferred frame for the candidate when it is sampled"""
+        if self._shadow_thread is None or random.random() >= self.shadow_fraction:
+            return
+        try:
+            self._shadow_queue.put_nowait((frame.copy(), detections, names, latency_ms, inference_args))
+        except Full:
+            self.shadow_stats.dropped += 1
+
+    def _run_shadow(self, candidate: LoadedModel):
+        while self.candidate is candidate and self._shadow_thread is not None:
+            try:
+                frame, live, names, live_ms, inference_args = self._shadow_queue.get(timeout=0.5)
+            except Empty:
+                continue
+            try:
+                started = time.perf_counter()
+                result = candidate.model(frame, verbose=False, device=self.device, **inference_args)[0]
+                candidate_ms = (time.perf_counter() - started) * 1000
+                detections = self._to_live_classes(boxes_to_array(result.boxes), candidate.names, names)
+                self.shadow_stats.add(live, detections, live_ms, candidate_ms, self.iou_threshold)
+            except Exception as e:
+                logger.error(f"Shadow inference failed: {str(e)}")
+
+    @staticmethod
+    def _to_live_classes(detections: np.ndarray, names: Dict[int, str], live_names: Dict[int, str]) -> np.ndarray:
+        """Renumber class ids by name so models trained with different class orders compare"""
+        if names == live_names or len(detections) == 0:
+            return detections
+        ids_by_name = {name: class_id for class_id, name in live_names.items()}
+        mapping = np.array([ids_by_name.get(names.get(i), -1) for i in range(max(names) + 1)], dtype=np.float32)
+        detections = detections.copy()
+        detections[:, CLS] = mapping[detections[:, CLS].astype(np.int64)]
+        return detections
+
+    def _stop_shadow(self):
+        """Stop the shadow worker and wait for it, so the candidate is never run from two threads"""
+        thread, self._shadow_thread = self._shadow_thread, None
+        if thread is not None:
+            # The worker checks _shadow_thread between frames, at most one inference is in flight
+            thread.join()
+        while not self._shadow_queue.empty():
+            try:
+                self._shadow_queue.get_nowait()
+            except Empty:
+                break
+
+    def promote(self) -> LoadedModel:
+        with self._lock:
+            if self.candidate is None:
+                raise RuntimeError("No candidate model is ready")
+            self._stop_shadow()
+            self.previous, self.live = self.live, self.candidate
+            self.candidate = None
+            self.state = "idle"
+            return self.live
+
+    def rollback(self) -> LoadedModel:
+        with self._lock:
+            if self.previous is None:
+                raise RuntimeError("No previous model to roll back to")
+            self._stop_shadow()
+            self.previous, self.live = self.live, self.previous
+            return self.live
+
+    def discard(self):
+        with self._lock:
+            self._generation += 1
+            self._stop_shadow()
+            self.candidate = None
+            self.state = "idle"
+            self.error = None
+
+    def status(self) -> dict:
+        return {
+            "live": self.live.describe() if self.live else None,
+            "previous": self.previous.describe() if self.previous else None,
+            "candidate": self.candidate.describe() if self.candidate else None,
+            "state": self.state,
+            "error": self.error,
+            "shadow_fraction": self.shadow_fraction,
+            "shadow": self.shadow_stats.snapshot() if self.shadow_fraction > 0 else None,
+        }
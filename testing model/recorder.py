@@ -0,0 +1,320 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from queue import Empty, Full, Queue
+from typing import List, Optional
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# One index entry per frame: capture time, byte offset and length of the JPEG in the segment
+INDEX_DTYPE = np.dtype([("ts", "<f8"), ("offset", "<u8"), ("length", "<u4")])
+JPEG_SOI = b"\xff\xd8"
+
+class Segment:
+    """A .bin file of concatenated JPEG frames plus its fixed-width .idx timestamp index"""
+
+    def __init__(self, directory: str, number: int):
+        self.number = number
+        base = os.path.join(directory, f"segment_{number:08d}")
+        self.data_path = base + ".bin"
+        self.index_path = base + ".idx"
+        self.first_ts = None
+        self.last_ts = None
+        self.size = 0
+
+    def load_bounds(self):
+        index = self.load_index()
+        if len(index):
+            self.first_ts = float(index["ts"][0])
+            self.last_ts = float(index["ts"][-1])
+        self.size = os.path.getsize(self.data_path) + os.path.getsize(self.index_path)
+
+    def load_index(self) -> np.ndarray:
+        """Memory-map the index, only whole entries of a segment still being written are seen"""
+        count = os.path.getsize(self.index_path) // INDEX_DTYPE.itemsize
+        if count == 0:
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        return np.memmap(self.index_path, dtype=INDEX_DTYPE, mode="r", shape=(count,))
+
+    def delete(self):
+        for path in (self.data_path, self.index_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+def list_segments(directory: str) -> List[Segment]:
+    segments = []
+    if not os.path.isdir(directory):
+        return segments
+    for name in sorted(os.listdir(directory)):
+        if name.startswith("segment_") and name.endswith(".idx"):
+            segment = Segment(directory, int(name[len("segment_"):-len(".idx")]))
+            if os.path.exists(segment.data_path):
+                segment.load_bounds()
+                segments.append(segment)
+    return segments
+
+class StreamRecorder:
+    """Writes incoming frames to rolling segment files from a background thread.
+
+    JPEG payloads from MJPEG sources are stored untouched (write_encoded); other
+    sources are encoded once (write_frame). Segments roll over at
+    ``segment_bytes`` and the oldest ones are deleted once the recording exceeds
+    ``max_bytes`` or is older than ``max_age`` seconds. Retention is checked on
+    open, on every rollover and every ``prune_interval`` seconds, so segments
+    still age out while the stream is idle or stalled.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024,
+                 max_bytes: Optional[int] = None, max_age: Optional[float] = None,
+                 jpeg_quality: int = 90, max_pending: int = 64, prune_interval: float = 60.0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.jpeg_quality = jpeg_quality
+        self.prune_interval = prune_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self.segments = list_segments(directory)
+        self.queue = Queue(maxsize=max_pending)
+        self.dropped = 0
+        self.recorded = 0
+        self._segment = None
+        self._data_file = None
+        self._index_file = None
+        self._running = False
+        self._thread = None
+        self._last_prune = time.monotonic()
+        self._enforce_retention()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+        self._close_segment()
+
+    def write_encoded(self, jpeg: bytes, timestamp: Optional[float] = None):
+        try:
+            self.queue.put_nowait((time.time() if timestamp is None else timestamp, bytes(jpeg)))
+        except Full:
+            self.dropped += 1
+
+    def write_frame(self, frame: np.ndarray, timestamp: Optional[float] = None):
+        timestamp = time.time() if timestamp is None else timestamp
+        ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if ok:
+            self.write_encoded(buffer.tobytes(), timestamp)
+
+    def _run(self):
+        while self._running or not self.queue.empty():
+            if time.monotonic() - self._last_prune >= self.prune_interval:
+                self._enforce_retention()
+            try:
+                timestamp, jpeg = self.queue.get(timeout=0.5)
+            except Empty:
+                continue
+            try:
+                self._append(timestamp, jpeg)
+            except OSError as e:
+                logger.error(f"Could not record frame: {str(e)}")
+
+    def _append(self, timestamp: float, jpeg: bytes):
+        if self._segment is None or self._segment.size >= self.segment_bytes:
+            self._roll_segment()
+
+        offset = self._data_file.tell()
+        self._data_file.write(jpeg)
+        self._data_file.flush()
+        entry = np.array([(timestamp, offset, len(jpeg))], dtype=INDEX_DTYPE)
+        self._index_file.write(entry.tobytes())
+        self._index_file.flush()
+
+        segment = self._segment
+        if segment.first_ts is None:
+            segment.first_ts = timestamp
+        segment.last_ts = timestamp
+        segment.size += len(jpeg) + INDEX_DTYPE.itemsize
+        self.recorded += 1
+
+    def _roll_segment(self):
+        self._close_segment()
+        number = self.segments[-1].number + 1 if self.segments else 1
+        self._segment = Segment(self.directory, number)
+        self._data_file = open(self._segment.data_path, "ab")
+        self._index_file = open(self._segment.index_path, "ab")
+        self.segments.append(self._segment)
+        self._enforce_retention()
+
+    def _close_segment(self):
+        for handle in (self._data_file, self._index_file):
+            if handle:
+                handle.close()
+        self._data_file = self._index_file = None
+
+    def _enforce_retention(self):
+        now = time.time()
+        self._last_prune = time.monotonic()
+        while self.segments:
+            oldest = self.segments[0]
+            too_big = self.max_bytes is not None and sum(s.size for s in self.segments) > self.max_bytes
+            too_old = self.max_age is not None and oldest.last_ts is not None and now - oldest.last_ts > self.max_age
+            if oldest is self._segment:
+                # The segment being written only goes once even its newest frame
+                # aged out, i.e. the stream stalled; the next frame opens a new one
+                if not too_old:
+                    break
+                self._close_segment()
+                self._segment = None
+            elif not (too_big or too_old):
+                break
+            oldest.delete()
+            self.segments.pop(0)
+
+class PassthroughCapture:
+    """VideoCapture stand-in that records the source's JPEG packets without re-encoding.
+
+    For MJPEG sources OpenCV's raw mode (CAP_PROP_FORMAT = -1) yields each
+    frame's JPEG, which is recorded as-is and decoded for the pipeline. Any
+    other codec falls back to decoded frames that the recorder encodes.
+    """
+
+    def __init__(self, url: str, recorder: StreamRecorder):
+        self.url = url
+        self.recorder = recorder
+        self.cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+        self.passthrough = False
+        self._first_packet = None
+        if self.cap.isOpened() and self.cap.set(cv2.CAP_PROP_FORMAT, -1):
+            ret, packet = self.cap.read()
+            if ret and packet.reshape(-1)[:2].tobytes() == JPEG_SOI:
+                self.passthrough = True
+                self._first_packet = packet
+            else:
+                self.cap.release()
+                self.cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+
+    def read(self, image=None):
+        if self.passthrough:
+            if self._first_packet is not None:
+                ret, packet, self._first_packet = True, self._first_packet, None
+            else:
+                ret, packet = self.cap.read()
+            if not ret:
+                return False, None
+            jpeg = packet.reshape(-1)
+            self.recorder.write_encoded(jpeg.tobytes())
+            frame = cv2.imdecode(jpeg, cv2.IMREAD_COLOR)
+            return frame is not None, frame
+
+        ret, frame = self.cap.read(image) if image is not None else self.cap.read()
+        if ret:
+            self.recorder.write_frame(frame)
+        return ret, frame
+
+    def __getattr__(self, name):
+        # isOpened, set, get and release go to the underlying capture
+        return getattr(self.cap, name)
+
+class RecordingReplay:
+    """VideoCapture stand-in replaying a recorded time range through the pipeline.
+
+    Seeking bisects the segment start times and then binary-searches the target
+    segment's memory-mapped index, so no segment data is scanned. With
+    ``realtime`` frames are paced by their recorded timestamps, otherwise they
+    are returned as fast as they can be decoded.
+    """
+
+    def __init__(self, directory: str, start: Optional[float] = None, end: Optional[float] = None,
+                 realtime: bool = True):
+        self.directory = directory
+        self.end = end
+        self.realtime = realtime
+        self.segments = [s for s in list_segments(directory) if s.first_ts is not None]
+        self._opened = bool(self.segments)
+        self._segment_position = 0
+        self._index = None
+        self._entry = 0
+        self._data_file = None
+        self._replay_started = None
+        self._first_ts = None
+        self.position = None
+        if self._opened:
+            self.seek(self.segments[0].first_ts if start is None else start)
+
+    def seek(self, timestamp: float):
+        starts = [segment.first_ts for segment in self.segments]
+        position = max(0, bisect.bisect_right(starts, timestamp) - 1)
+        self._open_segment(position)
+        self._entry = int(np.searchsorted(self._index["ts"], timestamp, side="left"))
+        self._replay_started = None
+
+    def _open_segment(self, position: int):
+        if self._data_file:
+            self._data_file.close()
+        self._segment_position = position
+        segment = self.segments[position]
+        self._index = segment.load_index()
+        self._data_file = open(segment.data_path, "rb")
+        self._entry = 0
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self, image=None):
+        if not self._opened:
+            return False, None
+
+        while self._entry >= len(self._index):
+            if self._segment_position + 1 >= len(self.segments):
+                # The last segment may still be growing, pick up entries written since
+                index = self.segments[self._segment_position].load_index()
+                if len(index) <= self._entry:
+                    return False, None
+                self._index = index
+                break
+            self._open_segment(self._segment_position + 1)
+
+        timestamp, offset, length = self._index[self._entry]
+        if self.end is not None and timestamp > self.end:
+            return False, None
+        self._entry += 1
+
+        if self.realtime:
+            now = time.monotonic()
+            if self._replay_started is None:
+                self._replay_started, self._first_ts = now, float(timestamp)
+            delay = (float(timestamp) - self._first_ts) - (now - self._replay_started)
+            if delay > 0:
+                time.sleep(delay)
+
+        self._data_file.seek(int(offset))
+        jpeg = np.frombuffer(self._data_file.read(int(length)), dtype=np.uint8)
+        frame = cv2.imdecode(jpeg, cv2.IMREAD_COLOR)
+        self.position = float(timestamp)
+        return frame is not None, frame
+
+    def set(self, prop_id, value):
+        return False
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_POS_MSEC and self.position is not None:
+            return self.position * 1000.0
+        return 0.0
+
+    def release(self):
+        self._opened = False
+        if self._data_file:
+            self._data_file.close()
+            self._data_file = None
+        self._index = None
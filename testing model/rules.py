@@ -0,0 +1,220 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional
+import cv2
+import numpy as np
+from detections import X1, Y1, X2, Y2, CONF, CLS
+
+logger = logging.getLogger(__name__)
+
+# Zones are rasterized onto this grid in frame-relative coordinates
+ZONE_GRID = (160, 120)
+MAX_ZONES = 64
+DEFAULT_CONFIDENCE = 0.4
+DEFAULT_THRESHOLD = 0.5
+
+def rules_from_class_names(class_names: List[str]) -> List[dict]:
+    """Rules equivalent to the plain ALERT_CLASSES list: show above 0.4, alert above 0.5"""
+    return [{"name": name, "confidence": DEFAULT_CONFIDENCE, "threshold": DEFAULT_THRESHOLD}
+            for name in class_names]
+
+class RuleEvaluation:
+    def __init__(self, visible: np.ndarray, alerting: np.ndarray, counts: np.ndarray, firing: np.ndarray):
+        self.visible = visible  # per detection: above the lowest display confidence of its class
+        self.alerting = alerting  # per detection: counts towards a firing rule
+        self.counts = counts  # per rule: qualifying detections in this frame
+        self.firing = firing  # per rule: all conditions met, including duration
+
+class CompiledRules:
+    """A camera's AlertClass list compiled into per-rule arrays.
+
+    Several rules may watch the same class, e.g. in different zones. Evaluating
+    a frame matches every detection against every rule in one (rules, detections)
+    mask, which stays small: a camera has a handful of rules and a frame a few
+    dozen detections.
+    """
+
+    def __init__(self, alert_classes: List[dict], class_names: Dict[int, str],
+                 default_confidence: float = DEFAULT_CONFIDENCE):
+        self.names = [rule["name"] for rule in alert_classes]
+        # Identifies a rule across reloads: its class, and which of that class's rules it is
+        self.keys = [(name, self.names[:index].count(name)) for index, name in enumerate(self.names)]
+        rule_count = len(alert_classes)
+        class_count = max(class_names) + 1 if class_names else 0
+        ids_by_name = {name.lower(): class_id for class_id, name in class_names.items()}
+
+        self.class_of_rule = np.full(rule_count, -1, dtype=np.int64)
+        self.visible_conf = np.full(class_count + 1, default_confidence, dtype=np.float32)
+        shown = np.zeros(class_count + 1, dtype=bool)
+        self.alert_conf = np.zeros(rule_count, dtype=np.float32)
+        self.min_count = np.ones(rule_count, dtype=np.int64)
+        self.min_duration = np.zeros(rule_count, dtype=np.float64)
+        self.zone_bit = np.zeros(rule_count, dtype=np.uint64)
+        self.zone_map = np.zeros((ZONE_GRID[1], ZONE_GRID[0]), dtype=np.uint64)
+        self.active_since = np.full(rule_count, np.nan)
+
+        zones = 0
+        for index, rule in enumerate(alert_classes):
+            class_id = ids_by_name.get(rule["name"].lower())
+            if class_id is None:
+                logger.error(f"Alert class {rule['name']} is not a class of this model")
+                continue
+            self.class_of_rule[index] = class_id
+            # A class watched by several rules is shown above the lowest of their confidences
+            confidence = rule.get("confidence", default_confidence)
+            self.visible_conf[class_id] = min(self.visible_conf[class_id], confidence) if shown[class_id] else confidence
+            shown[class_id] = True
+            self.alert_conf[index] = rule.get("threshold", DEFAULT_THRESHOLD)
+            self.min_count[index] = rule.get("min_count") or 1
+            self.min_duration[index] = rule.get("min_duration") or 0.0
+            if rule.get("zone"):
+                if zones == MAX_ZONES:
+                    logger.error(f"Only {MAX_ZONES} zones are supported, ignoring zone of {rule['name']}")
+                    continue
+                bit = np.uint64(1) << np.uint64(zones)
+                zones += 1
+                self.zone_bit[index] = bit
+                mask = np.zeros(self.zone_map.shape, dtype=np.uint8)
+                polygon = np.array(rule["zone"], dtype=np.float32) * np.array(ZONE_GRID, dtype=np.float32)
+                cv2.fillPoly(mask, [polygon.round().astype(np.int32)], 1)
+                self.zone_map[mask.astype(bool)] |= bit
+
+    def evaluate(self, detections: np.ndarray, frame_shape, now: float) -> RuleEvaluation:
+        classes = np.clip(detections[:, CLS].astype(np.int64), -1, len(self.visible_conf) - 1)
+        conf = detections[:, CONF]
+
+        visible = conf >= self.visible_conf[classes]
+        if not self.names:
+            # No rules: nothing can alert, every class is shown above the default confidence
+            return RuleEvaluation(visible, np.zeros(len(detections), dtype=bool),
+                                  np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool))
+        # (rules, detections): the detection is of the rule's class and above its threshold
+        qualifying = (classes[None, :] == self.class_of_rule[:, None]) & (conf[None, :] >= self.alert_conf[:, None])
+
+        if self.zone_bit.any() and len(detections):
+            height, width = frame_shape[:2]
+            cx = ((detections[:, X1] + detections[:, X2]) * (0.5 * ZONE_GRID[0] / width)).astype(np.int64)
+            cy = ((detections[:, Y1] + detections[:, Y2]) * (0.5 * ZONE_GRID[1] / height)).astype(np.int64)
+            cells = self.zone_map[np.clip(cy, 0, ZONE_GRID[1] - 1), np.clip(cx, 0, ZONE_GRID[0] - 1)]
+            required = self.zone_bit[:, None]
+            qualifying &= (required == 0) | ((cells[None, :] & required) != 0)
+
+        counts = qualifying.sum(axis=1)
+        active = counts >= self.min_count
+        self.active_since = np.where(active, np.where(np.isnan(self.active_since), now, self.active_since), np.nan)
+        firing = active & (now - np.nan_to_num(self.active_since, nan=now) >= self.min_duration)
+
+        alerting = (qualifying & firing[:, None]).any(axis=0)
+        return RuleEvaluation(visible, alerting, counts, firing)
+
+class RuleEngine:
+    """Holds the compiled rules of one camera and swaps them atomically on reload"""
+
+    def __init__(self, alert_classes: List[dict], default_confidence: float = DEFAULT_CONFIDENCE):
+        self.default_confidence = default_confidence
+        self.alert_classes = alert_classes
+        self._compiled: Optional[CompiledRules] = None
+        self._compiled_names = None
+        self._stale = True
+        self._lock = threading.Lock()
+
+    @property
+    def rule_names(self) -> List[str]:
+        """Watched class names, once each however many rules watch a class"""
+        return list(dict.fromkeys(rule["name"] for rule in self.alert_classes))
+
+    @property
+    def inference_conf(self) -> float:
+        """Lowest confidence any rule needs, the model must not filter below it"""
+        confidences = [self.default_confidence]
+        for rule in self.alert_classes:
+            confidences += [rule.get("confidence", DEFAULT_CONFIDENCE), rule.get("threshold", DEFAULT_THRESHOLD)]
+        return min(confidences)
+
+    def update(self, alert_classes: List[dict]):
+        with self._lock:
+            self.alert_classes = alert_classes
+            self._stale = True
+
+    def compiled(self, class_names: Dict[int, str]) -> CompiledRules:
+        with self._lock:
+            if self._stale or (self._compiled_names is not class_names and self._compiled_names != class_names):
+                previous = self._compiled
+                self._compiled = CompiledRules(self.alert_classes, class_names, self.default_confidence)
+                self._compiled_names = class_names
+                self._stale = False
+                # Keep running durations of rules that survived the reload
+                if previous is not None:
+                    for index, key in enumerate(self._compiled.keys):
+                        if key in previous.keys:
+                            self._compiled.active_since[index] = previous.active_since[previous.keys.index(key)]
+            return self._compiled
+
+    def evaluate(self, detections: np.ndarray, class_names: Dict[int, str], frame_shape,
+                 now: Optional[float] = None) -> RuleEvaluation:
+        return self.compiled(class_names).evaluate(detections, frame_shape, time.time() if now is None else now)
+
+class RuleSource:
+    """Polls the backend for a camera's alert classes and reloads the engine when they change.
+
+    Uses GET /api/cameras/{camera_id}/alert-classes with the alert ingest key;
+    the ETag makes an unchanged configuration a cheap 304.
+    """
+
+    def __init__(self, engine: RuleEngine, api_url: str, camera_id: str,
+                 ingest_key: Optional[str] = None, interval: float = 10.0, timeout: float = 5.0):
+        self.engine = engine
+        self.url = f"{api_url.rstrip('/')}/api/cameras/{camera_id}/alert-classes"
+        self.ingest_key = ingest_key
+        self.interval = interval
+        self.timeout = timeout
+        self.etag = None
+        self.reloads = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+
+    def poll(self) -> bool:
+        headers = {"X-Alert-Key": self.ingest_key or ""}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        request = urllib.request.Request(self.url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+                etag = response.headers.get("ETag") or hashlib.sha1(body).hexdigest()
+        except urllib.error.HTTPError as e:
+            if e.code != 304:
+                logger.error(f"Could not fetch alert rules: HTTP {e.code}")
+            return False
+        except Exception as e:
+            logger.error(f"Could not fetch alert rules: {str(e)}")
+            return False
+
+        if etag == self.etag:
+            return False
+        self.etag = etag
+        self.engine.update(json.loads(body))
+        self.reloads += 1
+        return True
+
+    def _run(self):
+        while self._running:
+            self.poll()
+            deadline = time.monotonic() + self.interval
+            while self._running and time.monotonic() < deadline:
+                time.sleep(0.5)
@@ -0,0 +1,151 @@
+import threading
+import time
+from typing import Dict, Optional
+
+class CameraBudget:
+    """Per-camera share of the inference budget, rate limited with a token bucket"""
+
+    def __init__(self, priority: float, min_rate: float, max_rate: float):
+        self.priority = priority
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.allocated_rate = min_rate
+        self.violation_level = 0.0  # smoothed violations per inferred frame
+        self.motion_level = 0.0  # smoothed mean frame difference, 0..1
+        self.tokens = 1.0
+        self.last_refill = time.monotonic()
+        self.inferred = 0  # frames inferred since the last reallocation
+        self.achieved_rate = 0.0
+
+class ComputeBudgetScheduler:
+    """Splits a global inference budget (frames/s) across cameras sharing one box.
+
+    Every camera is guaranteed ``min_rate``; the rest of the budget is shared in
+    proportion to priority, recent violation activity and motion, and is
+    recomputed every ``interval`` seconds. Cameras call should_infer() for each
+    frame they read and skip inference when it returns False.
+    """
+
+    def __init__(self, budget_fps: float, min_rate: float = 1.0, max_rate: float = 30.0,
+                 interval: float = 5.0, violation_weight: float = 4.0, motion_weight: float = 2.0,
+                 smoothing: float = 0.3):
+        self.budget_fps = budget_fps
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.interval = interval
+        self.violation_weight = violation_weight
+        self.motion_weight = motion_weight
+        self.smoothing = smoothing
+        self.cameras: Dict[str, CameraBudget] = {}
+        self._lock = threading.Lock()
+        self._last_reallocation = time.monotonic()
+        self._running = False
+        self._thread = None
+
+    def register(self, camera_id: str, priority: float = 1.0, min_rate: Optional[float] = None,
+                 max_rate: Optional[float] = None):
+        with self._lock:
+            self.cameras[camera_id] = CameraBudget(
+                priority,
+                self.min_rate if min_rate is None else min_rate,
+                self.max_rate if max_rate is None else max_rate,
+            )
+        self.reallocate()
+
+    def unregister(self, camera_id: str):
+        with self._lock:
+            self.cameras.pop(camera_id, None)
+        self.reallocate()
+
+    def should_infer(self, camera_id: str) -> bool:
+        """Take one token from the camera's bucket, False means skip this frame"""
+        with self._lock:
+            camera = self.cameras.get(camera_id)
+            if camera is None:
+                return True
+            now = time.monotonic()
+            camera.tokens = min(1.0, camera.tokens + (now - camera.last_refill) * camera.allocated_rate)
+            camera.last_refill = now
+            if camera.tokens < 1.0:
+                return False
+            camera.tokens -= 1.0
+            camera.inferred += 1
+            return True
+
+    def record(self, camera_id: str, violations: int, motion: float):
+        """Feed back the outcome of an inferred frame"""
+        with self._lock:
+            camera = self.cameras.get(camera_id)
+            if camera is None:
+                return
+            camera.violation_level += self.smoothing * (violations - camera.violation_level)
+            camera.motion_level += self.smoothing * (motion - camera.motion_level)
+
+    def reallocate(self):
+        with self._lock:
+            now = time.monotonic()
+            elapsed = max(now - self._last_reallocation, 1e-6)
+            self._last_reallocation = now
+
+            for camera in self.cameras.values():
+                camera.achieved_rate = camera.inferred / elapsed
+                camera.inferred = 0
+                camera.allocated_rate = camera.min_rate
+
+            # Water-fill what is left after the guaranteed minimums by weight,
+            # handing the share of cameras that hit max_rate back to the others
+            remaining = self.budget_fps - sum(c.allocated_rate for c in self.cameras.values())
+            open_cameras = [c for c in self.cameras.values() if c.allocated_rate < c.max_rate]
+            while remaining > 1e-6 and open_cameras:
+                weights = {id(c): self._weight(c) for c in open_cameras}
+                total_weight = sum(weights.values()) or 1.0
+                spent = 0.0
+                for camera in open_cameras:
+                    share = remaining * weights[id(camera)] / total_weight
+                    grant = min(share, camera.max_rate - camera.allocated_rate)
+                    camera.allocated_rate += grant
+                    spent += grant
+                remaining -= spent
+                open_cameras = [c for c in open_cameras if c.allocated_rate < c.max_rate - 1e-6]
+                if spent <= 1e-6:
+                    break
+
+    def _weight(self, camera: CameraBudget) -> float:
+        activity = 1.0 + self.violation_weight * camera.violation_level + self.motion_weight * camera.motion_level
+        return max(camera.priority, 0.0) * activity
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "budget_fps": self.budget_fps,
+                "interval": self.interval,
+                "cameras": {
+                    camera_id: {
+                        "priority": camera.priority,
+                        "min_rate": camera.min_rate,
+                        "allocated_rate": round(camera.allocated_rate, 2),
+                        "achieved_rate": round(camera.achieved_rate, 2),
+                        "violation_level": round(camera.violation_level, 3),
+                        "motion_level": round(camera.motion_level, 3),
+                    }
+                    for camera_id, camera in self.cameras.items()
+                },
+            }
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while self._running:
+            time.sleep(self.interval)
+            self.reallocate()
@@ -0,0 +1,59 @@
+import numpy as np
+from rules import CompiledRules, RuleEngine
+
+NAMES = {0: "Hardhat", 1: "Non-Helmet", 2: "no-vest"}
+
+def detections(*rows):
+    return np.array(rows, dtype=np.float32).reshape(-1, 6)
+
+def test_no_rules_shows_detections_above_default_confidence():
+    rules = CompiledRules([], NAMES)
+    evaluation = rules.evaluate(detections([0, 0, 10, 10, 0.9, 1], [0, 0, 10, 10, 0.2, 2]), (480, 640, 3), now=0.0)
+    assert evaluation.visible.tolist() == [True, False]
+    assert evaluation.alerting.tolist() == [False, False]
+    assert len(evaluation.counts) == 0 and len(evaluation.firing) == 0
+
+def test_no_rules_and_no_detections():
+    evaluation = RuleEngine([]).evaluate(detections(), NAMES, (480, 640, 3), now=0.0)
+    assert len(evaluation.visible) == 0 and len(evaluation.alerting) == 0
+
+def test_alert_threshold_below_display_confidence_still_alerts():
+    rules = CompiledRules([{"name": "Non-Helmet", "confidence": 0.6, "threshold": 0.3}], NAMES)
+    evaluation = rules.evaluate(detections([0, 0, 10, 10, 0.4, 1]), (480, 640, 3), now=0.0)
+    assert evaluation.visible.tolist() == [False]
+    assert evaluation.alerting.tolist() == [True]
+
+def test_min_count_and_duration():
+    rules = CompiledRules([{"name": "no-vest", "confidence": 0.4, "threshold": 0.5,
+                            "min_count": 2, "min_duration": 1.0}], NAMES)
+    pair = detections([0, 0, 10, 10, 0.9, 2], [20, 20, 30, 30, 0.8, 2])
+    assert not rules.evaluate(pair[:1], (480, 640, 3), now=0.0).firing[0]
+    assert not rules.evaluate(pair, (480, 640, 3), now=1.0).firing[0]
+    assert rules.evaluate(pair, (480, 640, 3), now=2.5).firing[0]
+
+def test_two_zones_on_the_same_class():
+    left = [[0.0, 0.0], [0.5, 0.0], [0.5, 1.0], [0.0, 1.0]]
+    right = [[0.5, 0.0], [1.0, 0.0], [1.0, 1.0], [0.5, 1.0]]
+    rules = CompiledRules([{"name": "Non-Helmet", "threshold": 0.5, "zone": left},
+                           {"name": "Non-Helmet", "threshold": 0.5, "zone": right, "min_count": 2}], NAMES)
+    one_each_side = detections([100, 100, 120, 120, 0.9, 1], [500, 100, 520, 120, 0.9, 1])
+    evaluation = rules.evaluate(one_each_side, (480, 640, 3), now=0.0)
+    assert evaluation.counts.tolist() == [1, 1]
+    assert evaluation.firing.tolist() == [True, False]
+    assert evaluation.alerting.tolist() == [True, False]
+
+    two_on_the_right = detections([400, 100, 420, 120, 0.9, 1], [500, 100, 520, 120, 0.9, 1])
+    evaluation = rules.evaluate(two_on_the_right, (480, 640, 3), now=1.0)
+    assert evaluation.counts.tolist() == [0, 2]
+    assert evaluation.firing.tolist() == [False, True]
+    assert evaluation.alerting.tolist() == [True, True]
+
+def test_reload_keeps_durations_of_rules_on_the_same_class():
+    engine = RuleEngine([{"name": "no-vest", "min_duration": 1.0},
+                         {"name": "no-vest", "min_count": 2, "min_duration": 1.0}])
+    pair = detections([0, 0, 10, 10, 0.9, 2], [20, 20, 30, 30, 0.9, 2])
+    engine.evaluate(pair[:1], NAMES, (480, 640, 3), now=0.0)
+    engine.evaluate(pair, NAMES, (480, 640, 3), now=1.0)
+    engine.update([dict(rule, threshold=0.6) for rule in engine.alert_classes])
+    assert engine.evaluate(pair, NAMES, (480, 640, 3), now=1.5).firing.tolist() == [True, False]
+    assert engine.rule_names == ["no-vest"]